@@ -1,3 +1,4 @@
-from core.security import verify_password, get_password_hash, create_access_token
+from core.security import verify_password, verify_and_check_rehash, get_password_hash, create_access_token
+from core.security import rehash_password
 
-__all__ = ["verify_password", "get_password_hash", "create_access_token"]
\ No newline at end of file
+__all__ = ["verify_password", "verify_and_check_rehash", "get_password_hash", "create_access_token", "rehash_password"]
\ No newline at end of file
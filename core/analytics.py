@@ -0,0 +1,50 @@
+import asyncio
+import logging
+from typing import Optional
+
+from core.config import ANALYTICS_REFRESH_SECONDS
+from dao.dao import AnalyticsDAO
+
+logger = logging.getLogger(__name__)
+
+
+class AnalyticsRefresher:
+    """Фоновое обновление materialized view с аналитикой по расписанию"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.skipped = 0
+        self.failed = 0
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if await AnalyticsDAO.refresh():
+                    self.refreshes += 1
+                else:
+                    self.skipped += 1
+            except Exception as e:
+                self.failed += 1
+                logger.warning("Error refreshing analytics view: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> dict:
+        return {"refreshes": self.refreshes, "skipped": self.skipped, "failed": self.failed}
+
+
+analytics_refresher = AnalyticsRefresher(ANALYTICS_REFRESH_SECONDS)
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from core.config import AUDIT_BATCH_SIZE, AUDIT_FLUSH_INTERVAL_SECONDS, AUDIT_QUEUE_SIZE
+from dao.dao import SecretReadEventDAO
+
+logger = logging.getLogger(__name__)
+
+# Маркер остановки в очереди: фоновая задача дописывает текущую пачку и завершается
+_STOP = object()
+
+
+class AuditLog:
+    """Асинхронный журнал чтений секретов: ограниченная очередь в памяти
+    и фоновая запись пачками (по размеру или по интервалу)"""
+
+    def __init__(self, max_queue: int, batch_size: int, flush_interval: float):
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.queue_high_water = 0
+
+    def record_read(self, user_id: int, secret_id: int, path: str,
+                    access_record_id: Optional[int] = None, client_ip: Optional[str] = None) -> None:
+        """Не блокирует: при полной очереди событие отбрасывается и учитывается в dropped"""
+        event = {
+            "read_at": datetime.now(timezone.utc),
+            "user_id": user_id,
+            "secret_id": secret_id,
+            "path": path,
+            "access_record_id": access_record_id,
+            "client_ip": client_ip,
+        }
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return
+        self.enqueued += 1
+        self.queue_high_water = max(self.queue_high_water, self._queue.qsize())
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Остановить фоновую задачу и дописать все, что осталось в очереди"""
+        if self._task is not None:
+            await self._queue.put(_STOP)
+            await self._task
+            self._task = None
+            self._stopping = False
+        while not self._queue.empty():
+            await self._flush(self._drain(self.batch_size))
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while not self._stopping:
+            batch = self._take(await self._queue.get())
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size and not self._stopping:
+                batch.extend(self._drain(self.batch_size - len(batch)))
+                timeout = deadline - loop.time()
+                if len(batch) >= self.batch_size or self._stopping or timeout <= 0:
+                    break
+                try:
+                    batch.extend(self._take(await asyncio.wait_for(self._queue.get(), timeout)))
+                except asyncio.TimeoutError:
+                    break
+            await self._flush(batch)
+
+    def _take(self, event) -> List[dict]:
+        if event is _STOP:
+            self._stopping = True
+            return []
+        return [event]
+
+    def _drain(self, limit: int) -> List[dict]:
+        events = []
+        while len(events) < limit and not self._stopping:
+            try:
+                events.extend(self._take(self._queue.get_nowait()))
+            except asyncio.QueueEmpty:
+                break
+        return events
+
+    async def _flush(self, batch: List[dict]) -> None:
+        if not batch:
+            return
+        try:
+            await SecretReadEventDAO.add_many(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error("Error writing audit batch of %d events: %s", len(batch), e)
+            return
+        self.written += len(batch)
+        self.batches += 1
+
+    def stats(self) -> dict:
+        return {
+            "queue_size": self._queue.qsize(),
+            "queue_max": self.max_queue,
+            "queue_high_water": self.queue_high_water,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+
+
+audit_log = AuditLog(AUDIT_QUEUE_SIZE, AUDIT_BATCH_SIZE, AUDIT_FLUSH_INTERVAL_SECONDS)
@@ -12,7 +12,88 @@ DB_NAME = os.getenv("DB_NAME")
 
 SECRET_HASH_KEY = os.getenv("SECRET_HASH_KEY")
 ACCESS_TOKEN_TTL_MINUTES = int(os.getenv("ACCESS_TOKEN_TTL_MINUTES"))
+# Первый администратор (scripts/create_admin.py); пароль по умолчанию стоит сменить
+ADMIN_USERNAME = os.getenv("ADMIN_USERNAME", "admin")
+ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "root")
+
+# Параметры argon2id; подобрать под железо: python scripts/calibrate_argon2.py
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))  # KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "4"))
+
+# Реплики только для чтения: "host1,host2:5433"; пусто — все запросы идут в primary
+DB_REPLICA_HOSTS = [host.strip() for host in os.getenv("DB_REPLICA_HOSTS", "").split(",") if host.strip()]
+DB_REPLICA_STRATEGY = os.getenv("DB_REPLICA_STRATEGY", "round_robin")  # round_robin | least_connections
+DB_REPLICA_RETRY_SECONDS = float(os.getenv("DB_REPLICA_RETRY_SECONDS", "30"))
 
 def get_db_url():
     return (f'postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@'
-            f'{DB_HOST}:{DB_PORT}/{DB_NAME}')
\ No newline at end of file
+            f'{DB_HOST}:{DB_PORT}/{DB_NAME}')
+
+def get_replica_db_urls():
+    urls = []
+    for host in DB_REPLICA_HOSTS:
+        if ":" not in host:
+            host = f'{host}:{DB_PORT}'
+        urls.append(f'postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{host}/{DB_NAME}')
+    return urls
+
+# Ограничение частоты попыток логина (token bucket): попыток в минуту и размер всплеска
+LOGIN_RATE_PER_USER = float(os.getenv("LOGIN_RATE_PER_USER", "5"))
+LOGIN_BURST_PER_USER = int(os.getenv("LOGIN_BURST_PER_USER", "5"))
+LOGIN_RATE_PER_IP = float(os.getenv("LOGIN_RATE_PER_IP", "30"))
+LOGIN_BURST_PER_IP = int(os.getenv("LOGIN_BURST_PER_IP", "20"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+# Аудит чтений секретов: размер очереди, размер пачки и интервал сброса в БД
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_INTERVAL_SECONDS = float(os.getenv("AUDIT_FLUSH_INTERVAL_SECONDS", "1.0"))
+
+# Период обновления materialized view с аналитикой по запросам доступа
+ANALYTICS_REFRESH_SECONDS = float(os.getenv("ANALYTICS_REFRESH_SECONDS", "60"))
+
+# Прогрев при старте: сколько соединений открыть заранее (не больше pool_size)
+DB_WARM_CONNECTIONS = int(os.getenv("DB_WARM_CONNECTIONS", "5"))
+# Сколько ждать завершения long-poll запросов при остановке
+SHUTDOWN_DRAIN_SECONDS = float(os.getenv("SHUTDOWN_DRAIN_SECONDS", "10"))
+
+# Дедлайн запроса по умолчанию; клиент может задать свой заголовком X-Request-Timeout (не больше максимума)
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "10"))
+REQUEST_TIMEOUT_MAX_SECONDS = float(os.getenv("REQUEST_TIMEOUT_MAX_SECONDS", "60"))
+# Ожидание свободного соединения в пуле и предел выполнения одного SQL-запроса (0 — без предела)
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "5"))
+DB_STATEMENT_TIMEOUT_SECONDS = float(os.getenv("DB_STATEMENT_TIMEOUT_SECONDS", "10"))
+
+
+def get_engine_options():
+    """Таймауты для create_async_engine: пул, statement_timeout на сервере и command_timeout в asyncpg.
+    command_timeout действует на каждый запрос соединения и не снимается SET LOCAL statement_timeout:
+    долгие служебные запросы (REFRESH view, полная загрузка индексов) идут через long_engine без этих опций"""
+    connect_args = {}
+    if DB_STATEMENT_TIMEOUT_SECONDS > 0:
+        connect_args = {
+            "server_settings": {"statement_timeout": str(int(DB_STATEMENT_TIMEOUT_SECONDS * 1000))},
+            # Страховка на стороне клиента, если сервер не ответил на отмену
+            "command_timeout": DB_STATEMENT_TIMEOUT_SECONDS + 1,
+        }
+    return {"pool_timeout": DB_POOL_TIMEOUT_SECONDS, "connect_args": connect_args}
+
+# Профилирование запросов по заголовку X-Profile: период сэмплирования и сколько профилей хранить
+PROFILE_INTERVAL_SECONDS = float(os.getenv("PROFILE_INTERVAL_SECONDS", "0.005"))
+PROFILE_STORE_SIZE = int(os.getenv("PROFILE_STORE_SIZE", "20"))
+
+# Монитор задержки event loop: период heartbeat, порог снятия стека блокирующего вызова, сколько мест показывать
+LOOP_LAG_INTERVAL_SECONDS = float(os.getenv("LOOP_LAG_INTERVAL_SECONDS", "0.1"))
+LOOP_LAG_THRESHOLD_SECONDS = float(os.getenv("LOOP_LAG_THRESHOLD_SECONDS", "0.1"))
+LOOP_LAG_TOP_SITES = int(os.getenv("LOOP_LAG_TOP_SITES", "10"))
+
+# Логирование: общий уровень, уровни отдельных логгеров ("sqlalchemy.engine=INFO,dao=DEBUG")
+# и ограничение повторов одинаковых предупреждений: не больше burst за окно
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = dict(
+    (name.strip(), level.strip().upper())
+    for name, _, level in (item.partition("=") for item in os.getenv("LOG_LEVELS", "").split(",") if "=" in item)
+)
+LOG_RATE_LIMIT_BURST = int(os.getenv("LOG_RATE_LIMIT_BURST", "10"))
+LOG_RATE_LIMIT_WINDOW_SECONDS = float(os.getenv("LOG_RATE_LIMIT_WINDOW_SECONDS", "60"))
@@ -0,0 +1,110 @@
+import asyncio
+import math
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import DBAPIError
+from starlette import status
+
+from core.config import DB_POOL_TIMEOUT_SECONDS, REQUEST_TIMEOUT_MAX_SECONDS, REQUEST_TIMEOUT_SECONDS
+
+DEADLINE_HEADER = b"x-request-timeout"
+# SQLSTATE query_canceled: сработал statement_timeout
+QUERY_CANCELED = "57014"
+
+# Момент (время event loop), к которому запрос должен завершиться; None — без дедлайна (фоновые задачи)
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+def set_timeout(seconds: float) -> None:
+    _deadline.set(asyncio.get_running_loop().time() + seconds)
+
+
+def extend(seconds: float) -> None:
+    """Дедлайн для долгих по смыслу запросов (long-poll): seconds плюс обычный бюджет запроса"""
+    set_timeout(seconds + REQUEST_TIMEOUT_SECONDS)
+
+
+def clear() -> None:
+    _deadline.set(None)
+
+
+def remaining() -> Optional[float]:
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - asyncio.get_running_loop().time()
+
+
+@asynccontextmanager
+async def bounded():
+    """Ограничить блок оставшимся временем запроса; истекший дедлайн — отказ сразу, без ожидания пула"""
+    left = remaining()
+    if left is None:
+        yield
+        return
+    if left <= 0:
+        raise DeadlineExceeded()
+    try:
+        async with asyncio.timeout(left):
+            yield
+    except TimeoutError as e:
+        raise DeadlineExceeded() from e
+    except DBAPIError as e:
+        if getattr(e.orig, "sqlstate", None) == QUERY_CANCELED:
+            raise DeadlineExceeded() from e
+        raise
+
+
+class DeadlineMiddleware:
+    """Дедлайн на каждый HTTP запрос: REQUEST_TIMEOUT_SECONDS или заголовок X-Request-Timeout (до максимума)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _deadline.set(asyncio.get_running_loop().time() + self._timeout(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _deadline.reset(token)
+
+    @staticmethod
+    def _timeout(scope) -> float:
+        for name, value in scope["headers"]:
+            if name == DEADLINE_HEADER:
+                try:
+                    timeout = float(value)
+                except ValueError:
+                    break
+                # nan/inf не годятся для asyncio.timeout: берем обычный дедлайн
+                if not math.isfinite(timeout):
+                    break
+                return min(max(timeout, 0.0), REQUEST_TIMEOUT_MAX_SECONDS)
+        return REQUEST_TIMEOUT_SECONDS
+
+
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+        content={"detail": "Request deadline exceeded"}
+    )
+
+
+async def pool_timeout_handler(request: Request, exc: Exception) -> JSONResponse:
+    # Все соединения заняты дольше DB_POOL_TIMEOUT_SECONDS: перегрузка, клиенту лучше повторить позже
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Database is overloaded"},
+        headers={"Retry-After": str(max(1, int(DB_POOL_TIMEOUT_SECONDS)))}
+    )
@@ -0,0 +1,32 @@
+import csv
+import io
+import json
+from datetime import date
+from typing import Any, AsyncIterator, List
+
+
+def _json_default(value: Any) -> str:
+    return value.isoformat() if isinstance(value, date) else str(value)
+
+
+async def ndjson_chunks(batches: AsyncIterator[List[dict]]) -> AsyncIterator[bytes]:
+    """Одна JSON-строка на запись, по чанку на пачку"""
+    async for batch in batches:
+        yield "".join(json.dumps(row, default=_json_default, ensure_ascii=False) + "\n" for row in batch).encode()
+
+
+async def csv_chunks(columns: List[str], batches: AsyncIterator[List[dict]]) -> AsyncIterator[bytes]:
+    """CSV с заголовком; JSON-колонки сериализуются строкой"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    yield buffer.getvalue().encode()
+    async for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        for row in batch:
+            writer.writerow({
+                key: json.dumps(value, ensure_ascii=False) if isinstance(value, (dict, list)) else value
+                for key, value in row.items()
+            })
+        yield buffer.getvalue().encode()
@@ -0,0 +1,99 @@
+import asyncio
+import os
+import signal
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+
+class Lifecycle:
+    """Готовность процесса и мягкая остановка: ready после прогрева, draining — с сигнала остановки.
+    Long-poll запросы регистрируются, чтобы при остановке вернуть ответ сразу, а не по таймауту"""
+
+    def __init__(self):
+        self.started = False
+        self.checks: Dict[str, bool] = {}
+        self._draining = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.long_polls = 0
+        self._resignal: Optional[asyncio.Task] = None
+
+    @property
+    def draining(self) -> bool:
+        return self._draining.is_set()
+
+    @property
+    def ready(self) -> bool:
+        return self.started and not self.draining and all(self.checks.values())
+
+    def install_signal_handlers(self, drain_timeout: float) -> None:
+        """SIGTERM/SIGINT сразу переводят в draining, затем вызывается прежний обработчик (uvicorn).
+        Иначе lifespan shutdown начнется только после завершения всех long-poll запросов.
+        Если прежний обработчик — SIG_DFL/SIG_IGN, после drain он восстанавливается и сигнал повторяется"""
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            previous = signal.getsignal(sig)
+
+            def handler(signum, frame, previous=previous):
+                loop.call_soon_threadsafe(self.start_draining)
+                if callable(previous):
+                    previous(signum, frame)
+                else:
+                    loop.call_soon_threadsafe(self._schedule_resignal, signum, previous, drain_timeout)
+
+            try:
+                signal.signal(sig, handler)
+            except ValueError:
+                # Не главный поток: остаемся на drain из lifespan shutdown
+                return
+
+    def start_draining(self) -> None:
+        self._draining.set()
+
+    def _schedule_resignal(self, signum: int, previous, drain_timeout: float) -> None:
+        if self._resignal is None:
+            self._resignal = asyncio.create_task(self._resignal_after_drain(signum, previous, drain_timeout))
+
+    async def _resignal_after_drain(self, signum: int, previous, drain_timeout: float) -> None:
+        await self.drain(drain_timeout)
+        signal.signal(signum, previous)
+        os.kill(os.getpid(), signum)
+
+    async def wait_draining(self, timeout: float) -> bool:
+        """Пауза long-poll цикла, прерываемая остановкой процесса"""
+        try:
+            await asyncio.wait_for(self._draining.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    @asynccontextmanager
+    async def long_poll(self):
+        self.long_polls += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self.long_polls -= 1
+            if self.long_polls == 0:
+                self._idle.set()
+
+    async def drain(self, timeout: float) -> bool:
+        """Дождаться завершения long-poll запросов; False — не успели за timeout"""
+        self.start_draining()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "draining": self.draining,
+            "checks": dict(self.checks),
+            "long_polls": self.long_polls,
+        }
+
+
+lifecycle = Lifecycle()
@@ -0,0 +1,135 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from core.config import LOOP_LAG_INTERVAL_SECONDS, LOOP_LAG_THRESHOLD_SECONDS, LOOP_LAG_TOP_SITES
+
+# Верхние границы корзин гистограммы задержки, мс
+LAG_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _is_project_frame(frame) -> bool:
+    filename = frame.f_code.co_filename
+    return filename.startswith(PROJECT_ROOT) and "site-packages" not in filename
+
+
+def _site(frame) -> str:
+    code = frame.f_code
+    if _is_project_frame(frame):
+        filename = os.path.relpath(code.co_filename, PROJECT_ROOT)
+    else:
+        filename = os.path.basename(code.co_filename)
+    return f"{code.co_qualname} ({filename}:{frame.f_lineno})"
+
+
+class LoopLagMonitor:
+    """Задержка event loop: фоновая задача засыпает на interval и меряет, насколько позже проснулась.
+    Сторожевой поток видит зависший heartbeat и снимает стек потока loop — так находится блокирующий вызов"""
+
+    def __init__(self, interval: float, threshold: float, top_sites: int):
+        self.interval = interval
+        self.threshold = threshold
+        self.top_sites = top_sites
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = 0.0
+        self._captured_beat = 0.0
+        self.buckets = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+        self.stalls = 0
+        self.sites: Counter = Counter()
+        self.site_stacks: Dict[str, str] = {}
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._stopped.set()
+            await asyncio.to_thread(self._watchdog.join)
+            self._watchdog = None
+
+    def observe(self, lag_ms: float) -> None:
+        self.count += 1
+        self.sum_ms += lag_ms
+        self.max_ms = max(self.max_ms, lag_ms)
+        for index, bound in enumerate(LAG_BUCKETS_MS):
+            if lag_ms <= bound:
+                self.buckets[index] += 1
+                return
+        self.buckets[-1] += 1
+
+    async def _heartbeat(self) -> None:
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._last_beat = time.monotonic()
+            self.observe(max(0.0, self._last_beat - started - self.interval) * 1000)
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self.threshold / 2):
+            beat = self._last_beat
+            # Один снимок на одну остановку loop: heartbeat опаздывает больше порога
+            if beat == self._captured_beat or time.monotonic() - beat < self.interval + self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            self._captured_beat = beat
+            self._record_stall(frame)
+
+    def _record_stall(self, frame) -> None:
+        stack = []
+        while frame is not None:
+            stack.append(frame)
+            frame = frame.f_back
+        # Место в нашем коде, откуда ушли в блокирующий вызов, и сам вызов (лист стека)
+        caller = next((f for f in stack if _is_project_frame(f)), None)
+        leaf = _site(stack[0]) if stack else "unknown"
+        site = f"{_site(caller)} -> {leaf}" if caller is not None and caller is not stack[0] else leaf
+        self.stalls += 1
+        self.sites[site] += 1
+        self.site_stacks[site] = ";".join(_site(f) for f in reversed(stack))
+
+    def stats(self) -> dict:
+        cumulative, histogram = 0, {}
+        for bound, count in zip([*LAG_BUCKETS_MS, "+Inf"], self.buckets):
+            cumulative += count
+            histogram[f"le_{bound}ms" if bound != "+Inf" else "le_inf"] = cumulative
+        return {
+            "count": self.count,
+            "avg_ms": round(self.sum_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "histogram": histogram,
+            "stalls": self.stalls,
+            "top_sites": [
+                {"site": site, "stalls": stalls, "stack": self.site_stacks[site]}
+                for site, stalls in self.sites.most_common(self.top_sites)
+            ],
+        }
+
+
+loop_monitor = LoopLagMonitor(LOOP_LAG_INTERVAL_SECONDS, LOOP_LAG_THRESHOLD_SECONDS, LOOP_LAG_TOP_SITES)
@@ -0,0 +1,155 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import List, Optional
+
+from core.config import PROFILE_INTERVAL_SECONDS, PROFILE_STORE_SIZE
+from core.security import verify_token
+from dao.dao import AdminDAO
+
+PROFILE_HEADER = b"x-profile"
+# Значения заголовка, включающие профилирование; "0", "false" и прочие — нет
+PROFILE_ENABLED_VALUES = (b"1", b"true")
+AWAIT_FRAME = "[await]"
+
+
+def _label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _await_chain(coro) -> list:
+    """Логический стек задачи: корутина -> то, что она ждет, и так до самого внутреннего await"""
+    frames = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None) or getattr(coro, "ag_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) or getattr(coro, "ag_await", None)
+    return frames
+
+
+class StackSampler(threading.Thread):
+    """Сэмплер одной задачи asyncio из отдельного потока через sys._current_frames.
+    Задача выполняется — берется реальный стек потока event loop, ждет — цепочка await с листом [await]
+    (ожидание БД, OpenBao и потоков to_thread видно так же, как работа на CPU)"""
+
+    def __init__(self, task: asyncio.Task, loop_thread_id: int, interval: float):
+        super().__init__(name="request-profiler", daemon=True)
+        self.task = task
+        self.loop_thread_id = loop_thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            stack = self._sample()
+            if stack:
+                self.samples[";".join(stack)] += 1
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+    def _sample(self) -> Optional[List[str]]:
+        chain = _await_chain(self.task.get_coro())
+        if not chain:
+            return None
+        thread_stack = []
+        frame = sys._current_frames().get(self.loop_thread_id)
+        while frame is not None:
+            thread_stack.append(frame)
+            frame = frame.f_back
+        thread_stack.reverse()
+        for index, frame in enumerate(thread_stack):
+            if frame is chain[0]:
+                return [_label(frame) for frame in thread_stack[index:]]
+        return [_label(frame) for frame in chain] + [AWAIT_FRAME]
+
+    def collapsed(self) -> str:
+        """Формат collapsed stacks (flamegraph.pl, speedscope): 'frame;frame;frame count'"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+
+class ProfileStore:
+    """Последние профили запросов в памяти процесса"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._profiles: "OrderedDict[str, dict]" = OrderedDict()
+
+    def add(self, profile: dict) -> None:
+        self._profiles[profile["id"]] = profile
+        if len(self._profiles) > self.size:
+            self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        return self._profiles.get(profile_id)
+
+    def list(self) -> List[dict]:
+        return [
+            {key: value for key, value in profile.items() if key != "collapsed"}
+            for profile in reversed(self._profiles.values())
+        ]
+
+
+profile_store = ProfileStore(PROFILE_STORE_SIZE)
+
+
+class ProfilingMiddleware:
+    """Профилирование запроса по заголовку X-Profile от администратора; профиль — /metrics/profiles/{X-Profile-Id}.
+    Без заголовка цена — один проход по списку заголовков"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not any(
+            name == PROFILE_HEADER and value.strip().lower() in PROFILE_ENABLED_VALUES for name, value in scope["headers"]
+        ):
+            await self.app(scope, receive, send)
+            return
+        if not await self._is_admin(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex[:16]
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        sampler = StackSampler(asyncio.current_task(), threading.get_ident(), PROFILE_INTERVAL_SECONDS)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            await asyncio.to_thread(sampler.stop)
+            profile_store.add({
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                "samples": sum(sampler.samples.values()),
+                "interval_ms": PROFILE_INTERVAL_SECONDS * 1000,
+                "collapsed": sampler.collapsed(),
+            })
+
+    @staticmethod
+    async def _is_admin(scope) -> bool:
+        authorization = dict(scope["headers"]).get(b"authorization", b"").decode()
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return False
+        payload = verify_token(token)
+        if payload is None or payload.get("sub") is None:
+            return False
+        return await AdminDAO.find_data_by_filter(username=payload["sub"]) is not None
@@ -0,0 +1,85 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+from fastapi import HTTPException, Request, status
+
+from core.config import (
+    LOGIN_BURST_PER_IP,
+    LOGIN_BURST_PER_USER,
+    LOGIN_RATE_PER_IP,
+    LOGIN_RATE_PER_USER,
+    RATE_LIMIT_MAX_KEYS,
+)
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class RateLimiter:
+    """Token bucket на ключ; при переполнении вытесняются самые давно неактивные корзины (LRU)"""
+
+    def __init__(self, rate_per_minute: float, burst: int, max_keys: int):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[Hashable, TokenBucket]" = OrderedDict()
+        self.rejected = 0
+        self.evicted = 0
+
+    def acquire(self, key: Hashable) -> Optional[float]:
+        """Списать токен. None — разрешено, иначе через сколько секунд появится токен"""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.burst, now)
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+                self.evicted += 1
+        else:
+            self._buckets.move_to_end(key)
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+            bucket.updated = now
+
+        if bucket.tokens < 1:
+            self.rejected += 1
+            return (1 - bucket.tokens) / self.rate if self.rate > 0 else math.inf
+        bucket.tokens -= 1
+        return None
+
+    def stats(self) -> dict:
+        return {"buckets": len(self._buckets), "rejected": self.rejected, "evicted": self.evicted}
+
+
+class LoginRateLimiter:
+    """Лимиты попыток логина по клиентскому IP и по username"""
+
+    def __init__(self):
+        self.by_ip = RateLimiter(LOGIN_RATE_PER_IP, LOGIN_BURST_PER_IP, RATE_LIMIT_MAX_KEYS)
+        self.by_user = RateLimiter(LOGIN_RATE_PER_USER, LOGIN_BURST_PER_USER, RATE_LIMIT_MAX_KEYS)
+
+    def check(self, request: Request, scope: str, username: str) -> None:
+        """Бросает 429 до любых обращений к БД и хэширования пароля"""
+        client_ip = request.client.host if request.client else "unknown"
+        retry_after = self.by_ip.acquire((scope, client_ip))
+        if retry_after is None:
+            retry_after = self.by_user.acquire((scope, username))
+        if retry_after is not None:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts, try again later",
+                headers={"Retry-After": str(math.ceil(min(retry_after, 3600)))},
+            )
+
+    def stats(self) -> dict:
+        return {"ip": self.by_ip.stats(), "username": self.by_user.stats()}
+
+
+login_rate_limiter = LoginRateLimiter()
@@ -1,15 +1,40 @@
+import asyncio
+import logging
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Awaitable, Callable, Optional, Tuple
 import jwt  # PyJWT
 from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
 
-from core.config import SECRET_HASH_KEY
+from core.config import SECRET_HASH_KEY, ARGON2_TIME_COST, ARGON2_MEMORY_COST, ARGON2_PARALLELISM
 
-password_hash = PasswordHash.recommended()
+logger = logging.getLogger(__name__)
+
+
+def build_argon2_hasher(
+        time_cost: int = ARGON2_TIME_COST,
+        memory_cost: int = ARGON2_MEMORY_COST,
+        parallelism: int = ARGON2_PARALLELISM,
+) -> Argon2Hasher:
+    return Argon2Hasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+
+
+password_hash = PasswordHash((build_argon2_hasher(),))
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return password_hash.verify(plain_password, hashed_password)
 
+def verify_and_check_rehash(plain_password: str, hashed_password: str) -> Tuple[bool, bool]:
+    """Проверить пароль; второй элемент — нужен ли перехэш (устарели параметры argon2). Сам хэш не считает"""
+    if not password_hash.verify(plain_password, hashed_password):
+        return False, False
+    return True, password_hash.current_hasher.check_needs_rehash(hashed_password)
+
+async def rehash_password(plain_password: str, save: Callable[[str], Awaitable]) -> None:
+    """Фоновая задача после ответа: новый хэш в пуле потоков, чтобы argon2 не занимал event loop"""
+    new_hash = await asyncio.to_thread(get_password_hash, plain_password)
+    await save(new_hash)
+
 def get_password_hash(password: str) -> str:
     return password_hash.hash(password)
 
@@ -28,11 +53,11 @@ def verify_token(token: str) -> Optional[dict]:
         payload = jwt.decode(token, SECRET_HASH_KEY, algorithms=["HS256"])  # algorithms как список
         return payload
     except jwt.ExpiredSignatureError:
-        print("Token expired")
+        logger.info("Token expired")
         return None
     except jwt.InvalidTokenError:
-        print("Invalid token")
+        logger.warning("Invalid token")
         return None
     except Exception as e:
-        print(f"JWT error: {e}")
+        logger.warning("JWT error: %s", e)
         return None
\ No newline at end of file
@@ -0,0 +1,35 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Объединение одинаковых конкурентных вызовов: пока вызов по ключу в полете,
+    остальные ждут его результат вместо повторного обращения к бэкенду"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.executed = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._calls[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+            self.executed += 1
+        else:
+            self.shared += 1
+        # shield: отмена одного ожидающего (обрыв клиента) не отменяет общий вызов
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, done: asyncio.Future) -> None:
+        if self._calls.get(key) is done:
+            del self._calls[key]
+        if not done.cancelled():
+            done.exception()  # помечаем исключение полученным, даже если ждать было некому
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._calls), "executed": self.executed, "shared": self.shared}
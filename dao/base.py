@@ -1,8 +1,8 @@
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.exc import SQLAlchemyError
 
-from database.database import async_session_maker, Base
-from typing import Generic, TypeVar
+from database.database import read_session, write_session, Base
+from typing import AsyncIterator, Generic, List, Optional, TypeVar
 
 T = TypeVar("T", bound=Base)
 
@@ -12,7 +12,7 @@ class BaseDAO(Generic[T]):
 
     @classmethod
     async def add(cls, **values):
-        async with async_session_maker() as session:
+        async with write_session() as session:
             new_instance = cls.model(**values)
             session.add(new_instance)
             try:
@@ -24,7 +24,7 @@ class BaseDAO(Generic[T]):
 
     @classmethod
     async def find_data_by_filter(cls, **filtered_by):
-        async with async_session_maker() as session:
+        async with read_session() as session:
             if filtered_by:
                 query = select(cls.model).filter_by(**filtered_by)
                 result = await session.execute(query)
@@ -35,4 +35,35 @@ class BaseDAO(Generic[T]):
                 record = result.scalars().all()
             return record
 
+    @classmethod
+    async def stream_rows(cls, batch_size: int = 1000) -> AsyncIterator[List[dict]]:
+        """Все строки таблицы пачками через серверный курсор; без ORM-объектов и identity map"""
+        async with read_session() as session:
+            query = select(*cls.model.__table__.c).order_by(cls.model.id)
+            result = await session.stream(query.execution_options(yield_per=batch_size))
+            async for partition in result.mappings().partitions():
+                yield [dict(row) for row in partition]
+
+    @classmethod
+    def update_query(cls, filters: dict, **values):
+        """UPDATE ... SET ... RETURNING по фильтру; ключи, которых нет среди колонок, игнорируются"""
+        columns = cls.model.__table__.c
+        values = {key: value for key, value in values.items() if key in columns}
+        return update(cls.model).filter_by(**filters).values(**values).returning(cls.model)
 
+    @classmethod
+    async def update_where(cls, filters: dict, **values) -> List[T]:
+        async with write_session() as session:
+            try:
+                result = await session.execute(cls.update_query(filters, **values))
+                instances = result.scalars().all()
+                await session.commit()
+                return instances
+            except SQLAlchemyError as e:
+                await session.rollback()
+                raise e
+
+    @classmethod
+    async def update_by_id(cls, instance_id: int, **values) -> Optional[T]:
+        instances = await cls.update_where({"id": instance_id}, **values)
+        return instances[0] if instances else None
@@ -0,0 +1,106 @@
+import asyncio
+import bisect
+import logging
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+
+from sqlalchemy import select
+
+from database.database import long_session_maker
+from database.models import Secret
+from database.notify import listener, notify
+
+CATALOG_CHANNEL = "secret_catalog"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Неизменяемый снимок каталога секретов"""
+    rows: Tuple[Secret, ...] = ()
+    path_to_id: Mapping[str, int] = field(default_factory=lambda: MappingProxyType({}))
+    by_id: Mapping[int, Secret] = field(default_factory=lambda: MappingProxyType({}))
+
+    @classmethod
+    def build(cls, rows) -> "CatalogSnapshot":
+        rows = tuple(sorted(rows, key=lambda row: row.id))
+        return cls(
+            rows=rows,
+            path_to_id=MappingProxyType({row.service_name: row.id for row in rows}),
+            by_id=MappingProxyType({row.id: row for row in rows}),
+        )
+
+    def find_by_path(self, path: str) -> Optional[Secret]:
+        secret_id = self.path_to_id.get(path)
+        return self.by_id.get(secret_id) if secret_id is not None else None
+
+    def page(self, after_id: Optional[int], limit: int) -> Tuple[Secret, ...]:
+        """Страница строк с id > after_id (rows отсортированы по id)"""
+        start = 0
+        if after_id is not None:
+            start = bisect.bisect_right(self.rows, after_id, key=lambda row: row.id)
+        return self.rows[start:start + limit]
+
+
+class SecretCatalog:
+    """Процессный кэш каталога: чтения без обращений к БД, замена снимка целиком"""
+
+    def __init__(self):
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = asyncio.Lock()
+
+    async def snapshot(self) -> CatalogSnapshot:
+        if self._snapshot is None:
+            async with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = await self._load()
+        return self._snapshot
+
+    async def refresh(self) -> CatalogSnapshot:
+        """Перечитать каталог из БД и атомарно подменить снимок"""
+        async with self._lock:
+            self._snapshot = await self._load()
+            return self._snapshot
+
+    async def apply(self, secret: Secret) -> None:
+        """Добавить/заменить одну запись без полного перечитывания"""
+        async with self._lock:
+            if self._snapshot is None:
+                self._snapshot = await self._load()
+                return
+            rows = {row.id: row for row in self._snapshot.rows}
+            rows[secret.id] = secret
+            self._snapshot = CatalogSnapshot.build(rows.values())
+
+    async def publish(self, secret: Secret) -> None:
+        """Обновить свой снимок и оповестить остальные процессы.
+        Вызывается после commit: запись уже есть, поэтому ошибки только логируются, а не уходят клиенту"""
+        try:
+            await self.apply(secret)
+        except Exception as e:
+            # Снимок перечитается целиком при следующем обращении
+            self._snapshot = None
+            logger.warning("Error applying secret %s to catalog: %s", secret.id, e)
+        try:
+            await notify(CATALOG_CHANNEL, secret_id=secret.id)
+        except Exception as e:
+            logger.warning("Error notifying catalog change for secret %s: %s", secret.id, e)
+
+    def subscribe(self) -> None:
+        listener.subscribe(CATALOG_CHANNEL, self._on_notification)
+
+    async def _on_notification(self, payload: dict) -> None:
+        await self.refresh()
+
+    @staticmethod
+    async def _load() -> CatalogSnapshot:
+        # Всегда primary: по уведомлению о записи реплика может еще не догнать.
+        # Вся таблица: соединение без command_timeout обычного пула
+        async with long_session_maker() as session:
+            result = await session.execute(select(Secret))
+            return CatalogSnapshot.build(result.scalars().all())
+
+
+secret_catalog = SecretCatalog()
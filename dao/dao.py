@@ -1,12 +1,28 @@
-from datetime import datetime
+import logging
+from datetime import datetime, timedelta, timezone
 
-from sqlalchemy import select
-from sqlalchemy.exc import SQLAlchemyError
-from typing import Optional, List
+from sqlalchemy import select, insert, delete, exists, literal, text, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError, TimeoutError as PoolTimeoutError
+from typing import Dict, Optional, List, Tuple, Union
 
+from core.deadline import DeadlineExceeded
+from core.singleflight import SingleFlight
 from dao.base import BaseDAO
-from database.models import User, Secret, Admin, AccessRequest, AccessStatus, AccessRecord
-from database.database import async_session_maker
+from dao.catalog import secret_catalog
+from dao.grants import grant_index
+from dao.path_trie import pattern_matches
+from dao.exceptions import AccessRequestNotFound, AccessRequestAlreadyApproved, ActiveAccessExists
+from dao.exceptions import InvalidAccessPeriod
+from database.models import User, Secret, Admin, AccessRequest, AccessStatus, AccessRecord, SecretReadEvent
+from database.models import Group, GroupMember, GroupGrant, PathGrant
+from database.models import secret_access_stats
+from database.database import read_session, write_session, long_session_maker
+
+logger = logging.getLogger(__name__)
+
+# Общие in-flight чтения: одинаковые конкурентные запросы уходят в БД один раз
+dao_flight = SingleFlight()
 
 
 class UserDAO(BaseDAO[User]):
@@ -16,9 +32,15 @@ class UserDAO(BaseDAO[User]):
     async def find_by_username(cls, username: str) -> Optional[User]:
         """Найти пользователя по username"""
         try:
-            return await cls.find_data_by_filter(username=username)
+            return await dao_flight.do(
+                ("user", username),
+                lambda: cls.find_data_by_filter(username=username)
+            )
+        except (DeadlineExceeded, PoolTimeoutError):
+            # Перегрузка и дедлайн — не "пользователь не найден": ответ дают обработчики 503/504
+            raise
         except SQLAlchemyError as e:
-            print(f"Error finding user by username {username}: {e}")
+            logger.error("Error finding user by username %s: %s", username, e)
             return None
 
     @classmethod
@@ -26,8 +48,10 @@ class UserDAO(BaseDAO[User]):
         """Найти пользователя по ID"""
         try:
             return await cls.find_data_by_filter(id=user_id)
+        except (DeadlineExceeded, PoolTimeoutError):
+            raise
         except SQLAlchemyError as e:
-            print(f"Error finding user by id {user_id}: {e}")
+            logger.error("Error finding user by id %s: %s", user_id, e)
             return None
 
     @classmethod
@@ -35,18 +59,64 @@ class UserDAO(BaseDAO[User]):
         """Создать нового пользователя"""
         try:
             return await cls.add(**user_data)
+        except (DeadlineExceeded, PoolTimeoutError):
+            raise
         except SQLAlchemyError as e:
-            print(f"Error creating user: {e}")
+            logger.error("Error creating user: %s", e)
             return None
 
 
 class SecretDAO(BaseDAO[Secret]):
     model = Secret
 
+    @classmethod
+    async def add(cls, **values):
+        secret = await super().add(**values)
+        await secret_catalog.publish(secret)
+        return secret
+
     @classmethod
     async def find_by_path(cls, path: str) -> Optional[Secret]:
-        """Найти секрет по path (service_name)"""
-        return await cls.find_data_by_filter(service_name=path)
+        """Найти секрет по path (service_name) в снимке каталога"""
+        return (await secret_catalog.snapshot()).find_by_path(path)
+
+    @classmethod
+    async def find_by_id(cls, secret_id: int) -> Optional[Secret]:
+        """Найти секрет по ID в снимке каталога"""
+        return (await secret_catalog.snapshot()).by_id.get(secret_id)
+
+    @classmethod
+    async def find_all(cls) -> List[Secret]:
+        """Весь каталог секретов из снимка"""
+        return list((await secret_catalog.snapshot()).rows)
+
+    @classmethod
+    async def find_page(cls, limit: int, after_id: Optional[int] = None) -> List[Secret]:
+        """Страница каталога из снимка (keyset по id)"""
+        return list((await secret_catalog.snapshot()).page(after_id, limit))
+
+    @classmethod
+    async def search_by_name(cls, q: str, limit: int = 50, after_id: Optional[int] = None) -> List[Secret]:
+        """Поиск по подстроке service_name (ILIKE, триграммный GIN индекс)"""
+        pattern = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        async with read_session() as session:
+            query = select(cls.model).where(cls.model.service_name.ilike(f"%{pattern}%", escape="\\"))
+            if after_id:
+                query = query.where(cls.model.id > after_id)
+            query = query.order_by(cls.model.id).limit(limit)
+            result = await session.execute(query)
+            return result.scalars().all()
+
+    @classmethod
+    async def search_by_key(cls, key: str, limit: int = 100, after_id: Optional[int] = None) -> List[Secret]:
+        """Секреты, содержащие ключ с таким именем (keys @> '["key"]', GIN индекс)"""
+        async with read_session() as session:
+            query = select(cls.model).where(cls.model.keys.contains([key]))
+            if after_id:
+                query = query.where(cls.model.id > after_id)
+            query = query.order_by(cls.model.id).limit(limit)
+            result = await session.execute(query)
+            return result.scalars().all()
 
 
 class AdminDAO(BaseDAO[Admin]):
@@ -59,7 +129,7 @@ class AccessRequestDAO(BaseDAO[AccessRequest]):
     @classmethod
     async def has_pending_request(cls, user_id: int, secret_id: int) -> bool:
         """Проверить, есть ли pending запрос у пользователя для секрета"""
-        async with async_session_maker() as session:
+        async with read_session() as session:
             query = select(cls.model).filter_by(
                 user_id=user_id,
                 secret_id=secret_id,
@@ -68,43 +138,69 @@ class AccessRequestDAO(BaseDAO[AccessRequest]):
             result = await session.execute(query)
             return result.scalar_one_or_none() is not None
 
-
     @classmethod
-    async def find_one(cls, **filters):
-        """Найти ОДНУ запись по фильтру (первую найденную)"""
-        async with async_session_maker() as session:
-            query = select(cls.model).filter_by(**filters)
+    async def has_approved_request(cls, user_id: int, secret_id: int) -> bool:
+        """Проверить, есть ли одобренный запрос у пользователя для секрета"""
+        async with read_session() as session:
+            query = select(exists().where(
+                cls.model.user_id == user_id,
+                cls.model.secret_id == secret_id,
+                cls.model.status == AccessStatus.APPROVED
+            ))
             result = await session.execute(query)
-            return result.scalar_one_or_none()
+            return result.scalar()
 
     @classmethod
-    async def update(cls, instance_id: int, **values):
-        """Обновить запись по ID"""
-        async with async_session_maker() as session:
+    async def create_pending(
+            cls,
+            user_id: int,
+            secret_id: int,
+            request_data: dict,
+            access_period: int,
+            access_reason: Optional[str] = None
+    ) -> Optional[AccessRequest]:
+        """Создать pending запрос одним INSERT ... ON CONFLICT DO NOTHING RETURNING.
+        None — уже есть pending (уникальный частичный индекс) или approved запрос"""
+        columns = cls.model.__table__.c
+        values = select(
+            literal(request_data, columns.request_data.type),
+            literal(access_period, columns.access_period.type),
+            literal(access_reason, columns.access_reason.type),
+            literal(AccessStatus.PENDING.value, columns.status.type),
+            literal(secret_id, columns.secret_id.type),
+            literal(user_id, columns.user_id.type),
+        ).where(~exists().where(
+            cls.model.user_id == user_id,
+            cls.model.secret_id == secret_id,
+            cls.model.status == AccessStatus.APPROVED
+        ))
+        query = pg_insert(cls.model).from_select(
+            ["request_data", "access_period", "access_reason", "status", "secret_id", "user_id"],
+            values
+        ).on_conflict_do_nothing(
+            index_elements=[cls.model.user_id, cls.model.secret_id],
+            # Предикат литералом: с bind-параметром Postgres не сопоставит частичный индекс
+            index_where=text("status = 'pending'")
+        ).returning(cls.model)
+
+        async with write_session() as session:
             try:
-                # Находим запись
-                query = select(cls.model).filter_by(id=instance_id)
                 result = await session.execute(query)
                 instance = result.scalar_one_or_none()
-
-                if not instance:
-                    return None
-
-                # Обновляем поля
-                for key, value in values.items():
-                    if hasattr(instance, key):
-                        setattr(instance, key, value)
-
-                session.add(instance)
                 await session.commit()
-                await session.refresh(instance)
                 return instance
-
             except SQLAlchemyError as e:
                 await session.rollback()
-                print(f"Error updating record: {e}")
                 raise e
 
+    @classmethod
+    async def find_one(cls, **filters):
+        """Найти ОДНУ запись по фильтру (первую найденную)"""
+        async with read_session() as session:
+            query = select(cls.model).filter_by(**filters)
+            result = await session.execute(query)
+            return result.scalar_one_or_none()
+
     @classmethod
     async def update_status(cls, request_id: int, status: AccessStatus, response_message: str = None):
         """Обновить статус запроса доступа"""
@@ -112,12 +208,81 @@ class AccessRequestDAO(BaseDAO[AccessRequest]):
         if response_message:
             update_data["response_message"] = response_message
 
-        return await cls.update(request_id, **update_data)
+        return await cls.update_by_id(request_id, **update_data)
+
+    @classmethod
+    async def change_status(
+            cls,
+            request_id: int,
+            status: AccessStatus,
+            response_message: str = None
+    ) -> Tuple[AccessRequest, Optional[AccessRecord]]:
+        """Сменить статус и при одобрении выдать доступ в одной транзакции.
+        Запрос блокируется SELECT ... FOR UPDATE, параллельные одобрения сериализуются"""
+        updated_request, access_record = await cls._change_status(request_id, status, response_message)
+        if access_record is not None:
+            await grant_index.publish(access_record)
+        return updated_request, access_record
+
+    @classmethod
+    async def _change_status(
+            cls,
+            request_id: int,
+            status: AccessStatus,
+            response_message: str = None
+    ) -> Tuple[AccessRequest, Optional[AccessRecord]]:
+        async with write_session() as session:
+            async with session.begin():
+                query = select(
+                    cls.model.status,
+                    cls.model.user_id,
+                    cls.model.secret_id,
+                    cls.model.access_period
+                ).filter_by(id=request_id).with_for_update()
+                current = (await session.execute(query)).one_or_none()
+                if current is None:
+                    raise AccessRequestNotFound()
+                if current.status == AccessStatus.APPROVED:
+                    raise AccessRequestAlreadyApproved()
+
+                update_data = {"status": status}
+                if response_message:
+                    update_data["response_message"] = response_message
+                query = cls.update_query({"id": request_id}, **update_data)
+                updated_request = (await session.execute(query)).scalar_one()
+
+                if status != AccessStatus.APPROVED:
+                    return updated_request, None
+                if not current.access_period or current.access_period <= 0:
+                    # Откатываем и смену статуса: без срока доступ не выдается
+                    raise InvalidAccessPeriod()
+
+                # Разные запросы одной пары (user, secret) тоже не должны выдать доступ дважды
+                await session.execute(select(func.pg_advisory_xact_lock(current.user_id, current.secret_id)))
+                record_columns = AccessRecord.__table__.c
+                expiration_date = datetime.now(timezone.utc) + timedelta(days=current.access_period)
+                values = select(
+                    literal(current.user_id, record_columns.user_id.type),
+                    literal(current.secret_id, record_columns.secret_id.type),
+                    literal(expiration_date, record_columns.expiration_date.type),
+                ).where(~exists().where(
+                    AccessRecord.user_id == current.user_id,
+                    AccessRecord.secret_id == current.secret_id,
+                    AccessRecord.expiration_date > func.now()
+                ))
+                query = insert(AccessRecord).from_select(
+                    ["user_id", "secret_id", "expiration_date"], values
+                ).returning(AccessRecord)
+                access_record = (await session.execute(query)).scalar_one_or_none()
+                if access_record is None:
+                    # Откатываем и смену статуса — транзакция целиком
+                    raise ActiveAccessExists()
+                return updated_request, access_record
 
     @classmethod
     async def find_all(cls, **filters) -> List[AccessRequest]:
         """Найти все записи с фильтрацией"""
-        async with async_session_maker() as session:
+        async with read_session() as session:
             query = select(cls.model)
             if filters:
                 query = query.filter_by(**filters)
@@ -133,7 +298,9 @@ class AccessRecordDAO(BaseDAO[AccessRecord]):
     @classmethod
     async def find_active_by_user_and_secret(cls, user_id: int, secret_id: int) -> Optional[AccessRecord]:
         """Найти активную запись доступа (не истекшую)"""
-        async with async_session_maker() as session:
+        if grant_index.loaded:
+            return grant_index.lookup(user_id, secret_id)
+        async with read_session() as session:
             query = select(cls.model).filter_by(
                 user_id=user_id,
                 secret_id=secret_id
@@ -145,7 +312,9 @@ class AccessRecordDAO(BaseDAO[AccessRecord]):
     @classmethod
     async def find_active_by_user(cls, user_id: int) -> List[AccessRecord]:
         """Найти все активные записи доступа пользователя"""
-        async with async_session_maker() as session:
+        if grant_index.loaded:
+            return grant_index.for_user(user_id)
+        async with read_session() as session:
             query = select(cls.model).filter_by(
                 user_id=user_id
             ).where(cls.model.expiration_date > datetime.now())
@@ -154,13 +323,317 @@ class AccessRecordDAO(BaseDAO[AccessRecord]):
             return result.scalars().all()
 
     @classmethod
-    async def get_active_access(cls, user_id: int, secret_id: int) -> Optional[AccessRecord]:
-        """Получить активную запись доступа"""
-        async with async_session_maker() as session:
+    async def find_effective_by_user(cls, user_id: int) -> List[Union[AccessRecord, GroupGrant, PathGrant]]:
+        """Все действующие доступы пользователя: личные, через группы и по шаблонам путей"""
+        if grant_index.loaded:
+            return grant_index.effective_for_user(user_id)
+        records = await cls.find_active_by_user(user_id)
+        user_groups = select(GroupMember.group_id).where(GroupMember.user_id == user_id)
+        async with read_session() as session:
+            query = select(GroupGrant).where(
+                GroupGrant.group_id.in_(user_groups),
+                GroupGrant.expiration_date > func.now()
+            ).order_by(GroupGrant.expiration_date)
+            # Самый долгий групповой доступ на секрет, если нет личного: поздние строки перезаписывают ранние
+            group_grants = {grant.secret_id: grant for grant in (await session.execute(query)).scalars()}
+            for record in records:
+                group_grants.pop(record.secret_id, None)
+            query = select(PathGrant).where(
+                (PathGrant.user_id == user_id) | PathGrant.group_id.in_(user_groups),
+                PathGrant.expiration_date > func.now()
+            )
+            path_grants = (await session.execute(query)).scalars().all()
+        return [*records, *group_grants.values(), *path_grants]
+
+    @classmethod
+    async def latest_by_paths(cls, user_id: int, paths: List[str]) -> Dict[str, Tuple[int, Optional[datetime]]]:
+        """Одним запросом: для каждого существующего пути id секрета и последний срок личного доступа (None — записей нет)"""
+        async with read_session() as session:
+            query = select(Secret.service_name, Secret.id, func.max(cls.model.expiration_date)).outerjoin(
+                cls.model, (cls.model.secret_id == Secret.id) & (cls.model.user_id == user_id)
+            ).where(Secret.service_name.in_(paths)).group_by(Secret.id)
+            result = await session.execute(query)
+            return {path: (secret_id, expires_at) for path, secret_id, expires_at in result}
+
+    @classmethod
+    async def shared_access_by_paths(
+            cls, user_id: int, secrets: Dict[str, int]
+    ) -> Dict[str, Union[GroupGrant, PathGrant]]:
+        """Групповые доступы и доступы по шаблону для набора {path: secret_id}: из индекса,
+        без него — два запроса на весь набор, а не по запросу на путь"""
+        if not secrets:
+            return {}
+        if grant_index.loaded:
+            shared = {
+                path: grant_index.lookup_group(user_id, secret_id) or grant_index.lookup_path(user_id, path)
+                for path, secret_id in secrets.items()
+            }
+            return {path: grant for path, grant in shared.items() if grant is not None}
+
+        user_groups = select(GroupMember.group_id).where(GroupMember.user_id == user_id)
+        async with read_session() as session:
+            query = select(GroupGrant).where(
+                GroupGrant.group_id.in_(user_groups),
+                GroupGrant.secret_id.in_(list(secrets.values())),
+                GroupGrant.expiration_date > func.now()
+            ).order_by(GroupGrant.expiration_date)
+            # Поздние строки перезаписывают ранние: остается самый долгий доступ на секрет
+            group_grants = {grant.secret_id: grant for grant in (await session.execute(query)).scalars()}
+            query = select(PathGrant).where(
+                (PathGrant.user_id == user_id) | PathGrant.group_id.in_(user_groups),
+                PathGrant.expiration_date > func.now()
+            ).order_by(PathGrant.expiration_date.desc())
+            path_grants = (await session.execute(query)).scalars().all()
+
+        shared = {}
+        for path, secret_id in secrets.items():
+            grant = group_grants.get(secret_id) or next(
+                (grant for grant in path_grants if pattern_matches(grant.pattern, path)), None
+            )
+            if grant is not None:
+                shared[path] = grant
+        return shared
+
+    @classmethod
+    async def get_active_access(
+            cls, user_id: int, secret_id: int, path: Optional[str] = None
+    ) -> Optional[Union[AccessRecord, GroupGrant, PathGrant]]:
+        """Получить активный доступ: личную запись, доступ через группу или по шаблону пути секрета"""
+        if grant_index.loaded:
+            return grant_index.effective(user_id, secret_id, path)
+        return await dao_flight.do(
+            ("active_access", user_id, secret_id, path),
+            lambda: cls._get_active_access(user_id, secret_id, path)
+        )
+
+    @classmethod
+    async def _get_active_access(
+            cls, user_id: int, secret_id: int, path: Optional[str] = None
+    ) -> Optional[Union[AccessRecord, GroupGrant, PathGrant]]:
+        async with read_session() as session:
             query = select(cls.model).filter_by(
                 user_id=user_id,
                 secret_id=secret_id
             ).where(cls.model.expiration_date > datetime.now())
 
             result = await session.execute(query)
-            return result.scalar_one_or_none()
+            record = result.scalar_one_or_none()
+            if record is not None:
+                return record
+
+            query = select(GroupGrant).join(
+                GroupMember, GroupMember.group_id == GroupGrant.group_id
+            ).where(
+                GroupMember.user_id == user_id,
+                GroupGrant.secret_id == secret_id,
+                GroupGrant.expiration_date > func.now()
+            ).order_by(GroupGrant.expiration_date.desc()).limit(1)
+            result = await session.execute(query)
+            grant = result.scalar_one_or_none()
+            if grant is not None or path is None:
+                return grant
+
+            # Шаблонов у пользователя и его групп немного: сопоставляем с путем здесь, а не в SQL
+            user_groups = select(GroupMember.group_id).where(GroupMember.user_id == user_id)
+            query = select(PathGrant).where(
+                (PathGrant.user_id == user_id) | PathGrant.group_id.in_(user_groups),
+                PathGrant.expiration_date > func.now()
+            ).order_by(PathGrant.expiration_date.desc())
+            result = await session.execute(query)
+            return next((grant for grant in result.scalars() if pattern_matches(grant.pattern, path)), None)
+
+    @classmethod
+    async def revoke(cls, record_id: int) -> Optional[AccessRecord]:
+        """Отозвать доступ: срок истекает сейчас, запись остается в истории"""
+        record = await cls.update_by_id(record_id, expiration_date=func.now())
+        if record is not None:
+            await grant_index.publish(record)
+        return record
+
+
+class GroupDAO(BaseDAO[Group]):
+    model = Group
+
+
+class GroupMemberDAO(BaseDAO[GroupMember]):
+    model = GroupMember
+
+    @classmethod
+    async def add_members(cls, group_id: int, user_ids: List[int]) -> int:
+        """Добавить участников одним INSERT; уже состоящие пропускаются. Возвращает число добавленных"""
+        if not user_ids:
+            return 0
+        query = pg_insert(cls.model).values(
+            [{"group_id": group_id, "user_id": user_id} for user_id in set(user_ids)]
+        ).on_conflict_do_nothing(constraint="uq_groupmembers_group_user").returning(cls.model.id)
+        async with write_session() as session:
+            try:
+                result = await session.execute(query)
+                added = len(result.all())
+                await session.commit()
+            except SQLAlchemyError as e:
+                await session.rollback()
+                raise e
+        await grant_index.publish_group(group_id)
+        return added
+
+    @classmethod
+    async def remove_member(cls, group_id: int, user_id: int) -> bool:
+        query = delete(cls.model).filter_by(group_id=group_id, user_id=user_id).returning(cls.model.id)
+        async with write_session() as session:
+            try:
+                result = await session.execute(query)
+                removed = result.scalar_one_or_none() is not None
+                await session.commit()
+            except SQLAlchemyError as e:
+                await session.rollback()
+                raise e
+        if removed:
+            await grant_index.publish_group(group_id)
+        return removed
+
+
+class GroupGrantDAO(BaseDAO[GroupGrant]):
+    model = GroupGrant
+
+    @classmethod
+    async def grant(cls, group_id: int, secret_id: int, access_period: int) -> GroupGrant:
+        """Выдать группе доступ на access_period дней; при действующем доступе — ActiveAccessExists"""
+        async with write_session() as session:
+            async with session.begin():
+                # Как для личных доступов: конкурентные выдачи одной пары не проходят обе
+                await session.execute(select(func.pg_advisory_xact_lock(group_id, secret_id)))
+                columns = cls.model.__table__.c
+                expiration_date = datetime.now(timezone.utc) + timedelta(days=access_period)
+                values = select(
+                    literal(group_id, columns.group_id.type),
+                    literal(secret_id, columns.secret_id.type),
+                    literal(expiration_date, columns.expiration_date.type),
+                ).where(~exists().where(
+                    cls.model.group_id == group_id,
+                    cls.model.secret_id == secret_id,
+                    cls.model.expiration_date > func.now()
+                ))
+                query = insert(cls.model).from_select(
+                    ["group_id", "secret_id", "expiration_date"], values
+                ).returning(cls.model)
+                grant = (await session.execute(query)).scalar_one_or_none()
+                if grant is None:
+                    raise ActiveAccessExists()
+        await grant_index.publish_group(group_id)
+        return grant
+
+    @classmethod
+    async def revoke(cls, grant_id: int) -> Optional[GroupGrant]:
+        """Отозвать доступ группы: срок истекает сейчас, запись остается в истории"""
+        grant = await cls.update_by_id(grant_id, expiration_date=func.now())
+        if grant is not None:
+            await grant_index.publish_group(grant.group_id)
+        return grant
+
+
+class PathGrantDAO(BaseDAO[PathGrant]):
+    model = PathGrant
+
+    @classmethod
+    async def grant(
+            cls, pattern: str, access_period: int, user_id: Optional[int] = None, group_id: Optional[int] = None
+    ) -> PathGrant:
+        """Выдать пользователю или группе доступ к поддереву секретов на access_period дней"""
+        grant = await cls.add(
+            pattern=pattern,
+            user_id=user_id,
+            group_id=group_id,
+            expiration_date=datetime.now(timezone.utc) + timedelta(days=access_period)
+        )
+        await grant_index.publish_path(grant)
+        return grant
+
+    @classmethod
+    async def revoke(cls, grant_id: int) -> Optional[PathGrant]:
+        """Отозвать доступ по шаблону: срок истекает сейчас, запись остается в истории"""
+        grant = await cls.update_by_id(grant_id, expiration_date=func.now())
+        if grant is not None:
+            await grant_index.publish_path(grant)
+        return grant
+
+
+class SecretReadEventDAO(BaseDAO[SecretReadEvent]):
+    model = SecretReadEvent
+
+    @classmethod
+    async def add_many(cls, events: List[dict]) -> None:
+        """Вставить пачку событий одним multi-row INSERT"""
+        async with write_session() as session:
+            try:
+                await session.execute(insert(cls.model).values(events))
+                await session.commit()
+            except SQLAlchemyError as e:
+                await session.rollback()
+                raise e
+
+    @classmethod
+    async def find_page(
+            cls,
+            since: Optional[datetime] = None,
+            until: Optional[datetime] = None,
+            before_id: Optional[int] = None,
+            limit: int = 100,
+            **filters
+    ) -> List[SecretReadEvent]:
+        """Страница событий за период, новые сначала (keyset по id)"""
+        async with read_session() as session:
+            query = select(cls.model).filter_by(**filters)
+            if since:
+                query = query.where(cls.model.read_at >= since)
+            if until:
+                query = query.where(cls.model.read_at < until)
+            if before_id:
+                query = query.where(cls.model.id < before_id)
+            query = query.order_by(cls.model.id.desc()).limit(limit)
+            result = await session.execute(query)
+            return result.scalars().all()
+
+
+class AnalyticsDAO:
+    view = secret_access_stats
+    # Ключ advisory lock: обновлять view одновременно должен только один экземпляр
+    REFRESH_LOCK_ID = 380038
+
+    @classmethod
+    async def refresh(cls) -> bool:
+        """REFRESH MATERIALIZED VIEW CONCURRENTLY; False — обновляет другой экземпляр"""
+        # Отдельное соединение: у обычного пула command_timeout asyncpg отменил бы REFRESH на клиенте
+        async with long_session_maker() as session:
+            async with session.begin():
+                locked = await session.execute(select(func.pg_try_advisory_xact_lock(cls.REFRESH_LOCK_ID)))
+                if not locked.scalar():
+                    return False
+                await session.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {cls.view.name}"))
+                return True
+
+    @classmethod
+    async def totals(cls) -> dict:
+        """Суммы по статусам и средняя задержка одобрения по всем секретам"""
+        v = cls.view.c
+        async with read_session() as session:
+            query = select(
+                func.coalesce(func.sum(v.pending), 0).label("pending"),
+                func.coalesce(func.sum(v.approved), 0).label("approved"),
+                func.coalesce(func.sum(v.rejected), 0).label("rejected"),
+                func.coalesce(func.sum(v.total), 0).label("total"),
+                func.coalesce(func.sum(v.active_grants), 0).label("active_grants"),
+                (func.sum(v.avg_approval_seconds * v.approved) / func.nullif(func.sum(v.approved), 0))
+                .label("avg_approval_seconds"),
+                func.max(v.refreshed_at).label("refreshed_at"),
+            )
+            result = await session.execute(query)
+            return dict(result.mappings().one())
+
+    @classmethod
+    async def top_secrets(cls, limit: int = 10) -> List[dict]:
+        """Секреты с наибольшим числом запросов доступа"""
+        async with read_session() as session:
+            query = select(cls.view).order_by(cls.view.c.total.desc()).limit(limit)
+            result = await session.execute(query)
+            return [dict(row) for row in result.mappings().all()]
@@ -0,0 +1,18 @@
+class AccessRequestError(Exception):
+    """Бизнес-ошибка при изменении статуса запроса доступа"""
+
+
+class AccessRequestNotFound(AccessRequestError):
+    pass
+
+
+class AccessRequestAlreadyApproved(AccessRequestError):
+    pass
+
+
+class ActiveAccessExists(AccessRequestError):
+    pass
+
+
+class InvalidAccessPeriod(AccessRequestError):
+    """Нельзя одобрить запрос без положительного access_period"""
@@ -0,0 +1,333 @@
+import asyncio
+import heapq
+import time
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from sqlalchemy import func, select
+
+from database.database import async_session_maker, long_session_maker
+from dao.path_trie import PathTrie
+from database.models import AccessRecord, GroupGrant, GroupMember, PathGrant
+from database.notify import listener, notify
+
+GRANTS_CHANNEL = "access_grants"
+# Вид записи в куче истечений
+USER_GRANT, GROUP_GRANT, PATH_GRANT = 0, 1, 2
+
+
+def _session_maker(filters: dict):
+    """Полная загрузка (без фильтров) читает всю таблицу: без клиентского command_timeout обычного пула"""
+    return async_session_maker if filters else long_session_maker
+
+
+class GrantIndex:
+    """Процессный индекс активных доступов user_id -> {secret_id: AccessRecord}
+    и групповых: group_id -> {secret_id: GroupGrant} плюс развернутое членство user_id -> {group_id}.
+    Проверка доступа — словарные поиски, число записей растет с числом команд, а не людей × секретов.
+    Доступы по шаблону пути лежат в trie по сегментам пути: один доступ покрывает поддерево.
+    Min-heap по времени истечения: доступ удаляется ровно в момент expiration_date"""
+
+    def __init__(self):
+        self._grants: Dict[int, Dict[int, AccessRecord]] = {}
+        self._group_grants: Dict[int, Dict[int, GroupGrant]] = {}
+        self._group_members: Dict[int, Set[int]] = {}
+        self._user_groups: Dict[int, Set[int]] = {}
+        self._paths = PathTrie()
+        # (expires_at, USER_GRANT | GROUP_GRANT | PATH_GRANT, user_id | group_id | 0, secret_id | 0, record_id)
+        self._heap: List[Tuple[float, int, int, int, int]] = []
+        # (kind, record_id, expires_at) уже лежащих в куче записей: перезагрузка по NOTIFY не плодит дубликаты
+        self._scheduled: Set[Tuple[int, int, float]] = set()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.loaded = False
+        self.evicted = 0
+
+    def lookup(self, user_id: int, secret_id: int) -> Optional[AccessRecord]:
+        record = self._grants.get(user_id, {}).get(secret_id)
+        # Проверка времени тут же: между тиками эвиктора истекший доступ не выдается
+        if record is None or record.expiration_date.timestamp() <= time.time():
+            return None
+        return record
+
+    def lookup_group(self, user_id: int, secret_id: int) -> Optional[GroupGrant]:
+        """Самый долгий активный доступ к секрету через группы пользователя"""
+        now = time.time()
+        best = None
+        for group_id in self._user_groups.get(user_id, ()):
+            grant = self._group_grants.get(group_id, {}).get(secret_id)
+            if grant is not None and grant.expiration_date.timestamp() > now:
+                if best is None or grant.expiration_date > best.expiration_date:
+                    best = grant
+        return best
+
+    def lookup_path(self, user_id: int, path: str) -> Optional[PathGrant]:
+        """Самый долгий активный доступ по шаблону пути: личный или через группы пользователя"""
+        now = time.time()
+        owners = [("user", user_id)] + [("group", group_id) for group_id in self._user_groups.get(user_id, ())]
+        best = None
+        for bucket in self._paths.match(path):
+            for owner in owners:
+                for grant in bucket.get(owner, {}).values():
+                    if grant.expiration_date.timestamp() > now:
+                        if best is None or grant.expiration_date > best.expiration_date:
+                            best = grant
+        return best
+
+    def effective(
+            self, user_id: int, secret_id: int, path: Optional[str] = None
+    ) -> Optional[Union[AccessRecord, GroupGrant, PathGrant]]:
+        """Личный доступ, иначе групповой, иначе по шаблону пути"""
+        return (
+            self.lookup(user_id, secret_id)
+            or self.lookup_group(user_id, secret_id)
+            or (self.lookup_path(user_id, path) if path is not None else None)
+        )
+
+    def for_user(self, user_id: int) -> List[AccessRecord]:
+        now = time.time()
+        return [
+            record for record in self._grants.get(user_id, {}).values()
+            if record.expiration_date.timestamp() > now
+        ]
+
+    def effective_for_user(self, user_id: int) -> List[Union[AccessRecord, GroupGrant, PathGrant]]:
+        """Все действующие доступы пользователя: личные, групповые (по секрету без личного — самый долгий)
+        и шаблоны путей, личные и групповые"""
+        now = time.time()
+        personal = self.for_user(user_id)
+        by_secret: Dict[int, GroupGrant] = {}
+        for group_id in self._user_groups.get(user_id, ()):
+            for secret_id, grant in self._group_grants.get(group_id, {}).items():
+                current = by_secret.get(secret_id)
+                if grant.expiration_date.timestamp() > now and (
+                        current is None or grant.expiration_date > current.expiration_date):
+                    by_secret[secret_id] = grant
+        for record in personal:
+            by_secret.pop(record.secret_id, None)
+        owners = [("user", user_id)] + [("group", group_id) for group_id in self._user_groups.get(user_id, ())]
+        paths = [grant for grant in self._paths.for_owners(owners) if grant.expiration_date.timestamp() > now]
+        return [*personal, *by_secret.values(), *paths]
+
+    def add(self, record: AccessRecord) -> None:
+        expires_at = record.expiration_date.timestamp()
+        if expires_at <= time.time():
+            return
+        user_grants = self._grants.setdefault(record.user_id, {})
+        current = user_grants.get(record.secret_id)
+        if current is not None and current.expiration_date >= record.expiration_date:
+            return
+        user_grants[record.secret_id] = record
+        self._schedule(expires_at, USER_GRANT, record.user_id, record.secret_id, record.id)
+
+    def add_group_grant(self, grant: GroupGrant) -> None:
+        expires_at = grant.expiration_date.timestamp()
+        if expires_at <= time.time():
+            return
+        group_grants = self._group_grants.setdefault(grant.group_id, {})
+        current = group_grants.get(grant.secret_id)
+        if current is not None and current.expiration_date >= grant.expiration_date:
+            return
+        group_grants[grant.secret_id] = grant
+        self._schedule(expires_at, GROUP_GRANT, grant.group_id, grant.secret_id, grant.id)
+
+    def add_path_grant(self, grant: PathGrant) -> None:
+        """Заменить доступ в trie; истекший только удаляется"""
+        self._paths.remove(grant.id)
+        expires_at = grant.expiration_date.timestamp()
+        if expires_at <= time.time():
+            return
+        owner = ("user", grant.user_id) if grant.user_id is not None else ("group", grant.group_id)
+        self._paths.add(grant, owner)
+        self._schedule(expires_at, PATH_GRANT, 0, 0, grant.id)
+
+    def set_members(self, group_id: int, user_ids: Set[int]) -> None:
+        """Заменить состав группы и поправить развернутое членство только у затронутых пользователей"""
+        previous = self._group_members.pop(group_id, set())
+        for user_id in previous - user_ids:
+            groups = self._user_groups.get(user_id)
+            if groups is not None:
+                groups.discard(group_id)
+                if not groups:
+                    del self._user_groups[user_id]
+        for user_id in user_ids - previous:
+            self._user_groups.setdefault(user_id, set()).add(group_id)
+        if user_ids:
+            self._group_members[group_id] = set(user_ids)
+
+    def _schedule(self, expires_at: float, kind: int, owner_id: int, secret_id: int, record_id: int) -> None:
+        key = (kind, record_id, expires_at)
+        if key in self._scheduled:
+            return
+        self._scheduled.add(key)
+        if not self._heap or expires_at < self._heap[0][0]:
+            self._wakeup.set()
+        heapq.heappush(self._heap, (expires_at, kind, owner_id, secret_id, record_id))
+
+    def remove(self, user_id: int, secret_id: int) -> None:
+        # Запись в куче остается и будет пропущена эвиктором
+        user_grants = self._grants.get(user_id)
+        if user_grants is not None:
+            user_grants.pop(secret_id, None)
+            if not user_grants:
+                del self._grants[user_id]
+
+    async def publish(self, record: AccessRecord) -> None:
+        """Обновить индекс после выдачи/отзыва доступа и оповестить остальные процессы"""
+        self.remove(record.user_id, record.secret_id)
+        self.add(record)
+        await notify(GRANTS_CHANNEL, user_id=record.user_id)
+
+    async def publish_group(self, group_id: int) -> None:
+        """После изменения состава или доступов группы: перечитать группу и оповестить остальные процессы"""
+        await self.reload_group(group_id)
+        await notify(GRANTS_CHANNEL, group_id=group_id)
+
+    async def publish_path(self, grant: PathGrant) -> None:
+        """Обновить ветку trie после выдачи/отзыва доступа по шаблону и оповестить остальные процессы"""
+        self.add_path_grant(grant)
+        await notify(GRANTS_CHANNEL, path_grant_id=grant.id)
+
+    async def load(self) -> None:
+        records = await self._fetch_active()
+        group_grants = await self._fetch_active_group_grants()
+        members = await self._fetch_members()
+        path_grants = await self._fetch_active_path_grants()
+        self._grants = {}
+        self._group_grants = {}
+        self._group_members = {}
+        self._user_groups = {}
+        self._paths = PathTrie()
+        self._heap = []
+        self._scheduled = set()
+        for record in records:
+            self.add(record)
+        for grant in group_grants:
+            self.add_group_grant(grant)
+        by_group: Dict[int, Set[int]] = {}
+        for member in members:
+            by_group.setdefault(member.group_id, set()).add(member.user_id)
+        for group_id, user_ids in by_group.items():
+            self.set_members(group_id, user_ids)
+        for grant in path_grants:
+            self.add_path_grant(grant)
+        self.loaded = True
+
+    async def reload_user(self, user_id: int) -> None:
+        records = await self._fetch_active(user_id=user_id)
+        self._grants.pop(user_id, None)
+        for record in records:
+            self.add(record)
+
+    async def reload_group(self, group_id: int) -> None:
+        grants = await self._fetch_active_group_grants(group_id=group_id)
+        members = await self._fetch_members(group_id=group_id)
+        self._group_grants.pop(group_id, None)
+        for grant in grants:
+            self.add_group_grant(grant)
+        self.set_members(group_id, {member.user_id for member in members})
+
+    async def reload_path_grant(self, grant_id: int) -> None:
+        async with async_session_maker() as session:
+            grant = await session.get(PathGrant, grant_id)
+        if grant is None:
+            self._paths.remove(grant_id)
+        else:
+            self.add_path_grant(grant)
+
+    def subscribe(self) -> None:
+        listener.subscribe(GRANTS_CHANNEL, self._on_notification)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._evict_expired())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _on_notification(self, payload: dict) -> None:
+        if "user_id" in payload:
+            await self.reload_user(payload["user_id"])
+        if "group_id" in payload:
+            await self.reload_group(payload["group_id"])
+        if "path_grant_id" in payload:
+            await self.reload_path_grant(payload["path_grant_id"])
+
+    async def _evict_expired(self) -> None:
+        while True:
+            self._wakeup.clear()
+            timeout = self._heap[0][0] - time.time() if self._heap else None
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            expires_at, kind, owner_id, secret_id, record_id = heapq.heappop(self._heap)
+            self._scheduled.discard((kind, record_id, expires_at))
+            if kind == USER_GRANT:
+                current = self._grants.get(owner_id, {}).get(secret_id)
+                if current is not None and current.id == record_id:
+                    self.remove(owner_id, secret_id)
+                    self.evicted += 1
+            elif kind == PATH_GRANT:
+                current = self._paths.get(record_id)
+                if current is not None and current.expiration_date.timestamp() <= expires_at:
+                    self._paths.remove(record_id)
+                    self.evicted += 1
+            else:
+                group_grants = self._group_grants.get(owner_id, {})
+                current = group_grants.get(secret_id)
+                if current is not None and current.id == record_id:
+                    del group_grants[secret_id]
+                    if not group_grants:
+                        del self._group_grants[owner_id]
+                    self.evicted += 1
+
+    @staticmethod
+    async def _fetch_active(**filters) -> List[AccessRecord]:
+        # Primary: индекс обновляется сразу после записи
+        async with _session_maker(filters)() as session:
+            query = select(AccessRecord).filter_by(**filters).where(AccessRecord.expiration_date > func.now())
+            result = await session.execute(query)
+            return result.scalars().all()
+
+    @staticmethod
+    async def _fetch_active_group_grants(**filters) -> List[GroupGrant]:
+        async with _session_maker(filters)() as session:
+            query = select(GroupGrant).filter_by(**filters).where(GroupGrant.expiration_date > func.now())
+            result = await session.execute(query)
+            return result.scalars().all()
+
+    @staticmethod
+    async def _fetch_active_path_grants() -> List[PathGrant]:
+        async with long_session_maker() as session:
+            result = await session.execute(select(PathGrant).where(PathGrant.expiration_date > func.now()))
+            return result.scalars().all()
+
+    @staticmethod
+    async def _fetch_members(**filters) -> List[GroupMember]:
+        async with _session_maker(filters)() as session:
+            result = await session.execute(select(GroupMember).filter_by(**filters))
+            return result.scalars().all()
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "users": len(self._grants),
+            "grants": sum(len(grants) for grants in self._grants.values()),
+            "groups": len(self._group_members),
+            "group_grants": sum(len(grants) for grants in self._group_grants.values()),
+            "memberships": sum(len(groups) for groups in self._user_groups.values()),
+            "path_grants": len(self._paths),
+            "heap": len(self._heap),
+            "evicted": self.evicted,
+        }
+
+
+grant_index = GrantIndex()
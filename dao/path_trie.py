@@ -0,0 +1,113 @@
+from typing import Dict, List, Tuple
+
+WILDCARD = "*"
+
+# Владелец доступа в корзине узла: ("user", user_id) или ("group", group_id)
+Owner = Tuple[str, int]
+
+
+def split_pattern(pattern: str) -> List[str]:
+    """Сегменты шаблона; '*' — целый сегмент: внутри пути — ровно один сегмент, в конце — все поддерево"""
+    segments = pattern.strip("/").split("/")
+    if not all(segments) or any(WILDCARD in segment and segment != WILDCARD for segment in segments):
+        raise ValueError(f"Invalid path pattern '{pattern}'")
+    return segments
+
+
+def pattern_matches(pattern: str, path: str) -> bool:
+    """Проверка одного шаблона без trie (для чтения из БД, когда индекс не загружен)"""
+    segments = split_pattern(pattern)
+    parts = path.strip("/").split("/")
+    if segments[-1] == WILDCARD:
+        segments = segments[:-1]
+        if len(parts) <= len(segments):
+            return False
+        parts = parts[:len(segments)]
+    elif len(parts) != len(segments):
+        return False
+    return all(segment == WILDCARD or segment == part for segment, part in zip(segments, parts))
+
+
+class _Node:
+    __slots__ = ("children", "exact", "subtree")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        # owner -> {grant_id: grant}: exact — путь заканчивается здесь, subtree — все, что глубже
+        self.exact: Dict[Owner, dict] = {}
+        self.subtree: Dict[Owner, dict] = {}
+
+    def is_empty(self) -> bool:
+        return not (self.children or self.exact or self.subtree)
+
+
+class PathTrie:
+    """Trie шаблонов путей доступа по сегментам service_name ('team/service/env').
+    Добавление и удаление шаблона меняют только его ветку; проверка пути — проход на глубину пути"""
+
+    def __init__(self):
+        self._root = _Node()
+        self._grants: Dict[int, Tuple[List[str], bool, Owner, object]] = {}
+
+    def __len__(self) -> int:
+        return len(self._grants)
+
+    def get(self, grant_id: int):
+        entry = self._grants.get(grant_id)
+        return entry[3] if entry is not None else None
+
+    def for_owners(self, owners) -> list:
+        """Все шаблоны указанных владельцев (перебор по числу шаблонов, не по дереву)"""
+        owners = set(owners)
+        return [entry[3] for entry in self._grants.values() if entry[2] in owners]
+
+    def add(self, grant, owner: Owner) -> None:
+        self.remove(grant.id)
+        segments = split_pattern(grant.pattern)
+        subtree = segments[-1] == WILDCARD
+        if subtree:
+            segments = segments[:-1]
+        node = self._root
+        for segment in segments:
+            node = node.children.setdefault(segment, _Node())
+        bucket = node.subtree if subtree else node.exact
+        bucket.setdefault(owner, {})[grant.id] = grant
+        self._grants[grant.id] = (segments, subtree, owner, grant)
+
+    def remove(self, grant_id: int) -> None:
+        entry = self._grants.pop(grant_id, None)
+        if entry is None:
+            return
+        segments, subtree, owner, _ = entry
+        nodes = [self._root]
+        for segment in segments:
+            nodes.append(nodes[-1].children[segment])
+        bucket = nodes[-1].subtree if subtree else nodes[-1].exact
+        grants = bucket[owner]
+        del grants[grant_id]
+        if not grants:
+            del bucket[owner]
+        # Подрезаем опустевшие узлы снизу вверх
+        for depth in range(len(segments), 0, -1):
+            if not nodes[depth].is_empty():
+                break
+            del nodes[depth - 1].children[segments[depth - 1]]
+
+    def match(self, path: str) -> List[Dict[Owner, dict]]:
+        """Корзины всех шаблонов, покрывающих путь"""
+        buckets = []
+        frontier = [self._root]
+        for segment in path.strip("/").split("/"):
+            next_frontier = []
+            for node in frontier:
+                if node.subtree:
+                    buckets.append(node.subtree)
+                for key in (segment, WILDCARD):
+                    child = node.children.get(key)
+                    if child is not None:
+                        next_frontier.append(child)
+            frontier = next_frontier
+            if not frontier:
+                return buckets
+        buckets.extend(node.exact for node in frontier if node.exact)
+        return buckets
@@ -0,0 +1,45 @@
+from contextlib import asynccontextmanager
+from typing import Iterable, List, Sequence
+
+import asyncpg
+from sqlalchemy import insert
+
+from core.config import get_db_url
+from database.database import async_session_maker
+
+# Предел bind-параметров в одном запросе Postgres (int16)
+MAX_BIND_PARAMS = 32767
+
+
+def get_asyncpg_dsn() -> str:
+    return get_db_url().replace('postgresql+asyncpg://', 'postgresql://', 1)
+
+
+@asynccontextmanager
+async def bulk_connection():
+    """Отдельное соединение asyncpg для COPY (вне пула приложения)"""
+    connection = await asyncpg.connect(get_asyncpg_dsn())
+    try:
+        yield connection
+    finally:
+        await connection.close()
+
+
+async def copy_rows(connection, table_name: str, columns: Sequence[str], rows: Iterable[tuple]) -> int:
+    """COPY ... FROM STDIN одной транзакцией; неуказанные колонки получают server default"""
+    rows = list(rows)
+    async with connection.transaction():
+        await connection.copy_records_to_table(table_name, records=rows, columns=list(columns))
+    return len(rows)
+
+
+async def insert_rows(model, rows: List[dict]) -> int:
+    """Запасной путь без COPY: multi-row INSERT, разбитый по лимиту bind-параметров"""
+    if not rows:
+        return 0
+    step = max(1, MAX_BIND_PARAMS // len(rows[0]))
+    async with async_session_maker() as session:
+        for start in range(0, len(rows), step):
+            await session.execute(insert(model).values(rows[start:start + step]))
+        await session.commit()
+    return len(rows)
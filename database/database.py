@@ -1,17 +1,132 @@
+import asyncio
+import itertools
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from datetime import datetime
-from typing import Annotated
+from typing import Annotated, Dict, List, Optional
 
-from sqlalchemy import Integer, func
+from sqlalchemy import Integer, func, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.pool import NullPool
 from sqlalchemy.orm import DeclarativeBase, declared_attr, class_mapper, mapped_column, Mapped
 
-from core.config import get_db_url
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncAttrs
+from core import deadline
+from core.config import get_db_url, get_replica_db_urls, get_engine_options, DB_REPLICA_STRATEGY, DB_REPLICA_RETRY_SECONDS
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncAttrs, AsyncEngine, AsyncSession
 
 DATABASE_URL = get_db_url()
 
-engine = create_async_engine(url=DATABASE_URL)
+engine = create_async_engine(url=DATABASE_URL, **get_engine_options())
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
+# Долгие служебные запросы по всей таблице (REFRESH view, полная загрузка индексов и каталога):
+# без statement_timeout и command_timeout из get_engine_options; соединение только на время запроса
+long_engine = create_async_engine(url=DATABASE_URL, poolclass=NullPool)
+long_session_maker = async_sessionmaker(long_engine, expire_on_commit=False)
+
+replica_engines = [create_async_engine(url=url, **get_engine_options()) for url in get_replica_db_urls()]
+
+# Выставляется при записи и остается до конца запроса (задачи): последующие чтения идут в primary
+_primary_pinned: ContextVar[bool] = ContextVar("primary_pinned", default=False)
+
+
+class ReplicaRouter:
+    """Выбор реплики для чтения: round-robin или по числу занятых соединений.
+    Недоступная реплика исключается на retry_seconds"""
+
+    def __init__(self, engines: List[AsyncEngine], strategy: str, retry_seconds: float):
+        self.engines = engines
+        self.strategy = strategy
+        self.retry_seconds = retry_seconds
+        self._counter = itertools.count()
+        self._down_until: Dict[int, float] = {}
+        self.fallbacks = 0
+
+    def pick(self) -> Optional[AsyncEngine]:
+        now = time.monotonic()
+        alive = [e for e in self.engines if self._down_until.get(id(e), 0) <= now]
+        if not alive:
+            return None
+        if self.strategy == "least_connections":
+            return min(alive, key=lambda e: e.pool.checkedout())
+        return alive[next(self._counter) % len(alive)]
+
+    def mark_down(self, engine: AsyncEngine) -> None:
+        self._down_until[id(engine)] = time.monotonic() + self.retry_seconds
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "replicas": len(self.engines),
+            "down": sum(1 for until in self._down_until.values() if until > now),
+            "fallbacks": self.fallbacks,
+        }
+
+
+replica_router = ReplicaRouter(replica_engines, DB_REPLICA_STRATEGY, DB_REPLICA_RETRY_SECONDS)
+
+
+def pin_primary() -> None:
+    _primary_pinned.set(True)
+
+
+@asynccontextmanager
+async def write_session():
+    """Сессия primary для записи; закрепляет дальнейшие чтения за primary"""
+    pin_primary()
+    async with deadline.bounded(), async_session_maker() as session:
+        yield session
+
+
+async def _open_replica_session() -> Optional[AsyncSession]:
+    if _primary_pinned.get():
+        return None
+    replica = replica_router.pick()
+    if replica is None:
+        return None
+    session = AsyncSession(bind=replica, expire_on_commit=False)
+    try:
+        await session.connection()
+    except (OSError, DBAPIError, TimeoutError):
+        await session.close()
+        replica_router.mark_down(replica)
+        replica_router.fallbacks += 1
+        return None
+    return session
+
+
+@asynccontextmanager
+async def read_session():
+    """Сессия для чтения: реплика, если настроены и запрос не закреплен за primary"""
+    async with deadline.bounded():
+        session = await _open_replica_session()
+        if session is None:
+            async with async_session_maker() as session:
+                yield session
+            return
+        async with session:
+            yield session
+
+
+async def warm_up_pool(pool_engine: AsyncEngine, connections: int) -> int:
+    """Открыть сразу несколько соединений, чтобы первые запросы не ждали подключения к БД"""
+    # Соединения держатся одновременно, иначе пул переиспользует одно и то же
+    opened = [pool_engine.connect() for _ in range(min(connections, pool_engine.pool.size()))]
+    try:
+        await asyncio.gather(*(connection.start() for connection in opened))
+        await asyncio.gather(*(connection.execute(text("SELECT 1")) for connection in opened))
+    finally:
+        await asyncio.gather(*(connection.close() for connection in opened), return_exceptions=True)
+    return len(opened)
+
+
+async def dispose_engines() -> None:
+    await engine.dispose()
+    await long_engine.dispose()
+    for replica in replica_engines:
+        await replica.dispose()
+
 
 uniq_str_an = Annotated[str, mapped_column(unique=True)]
 
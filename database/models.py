@@ -1,7 +1,9 @@
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, Boolean, Integer, Text, JSON, ForeignKey, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import String, Boolean, Integer, Text, JSON, ForeignKey, DateTime, Index, text
+from sqlalchemy import BigInteger, CheckConstraint, Column, Float, MetaData, Table, UniqueConstraint
 from sqlalchemy.sql import func
 from database.database import Base
 from enum import Enum
@@ -33,7 +35,16 @@ class Admin(Base):
 class Secret(Base):
 
     service_name: Mapped[str] = mapped_column(String(100), nullable=False)
-    keys: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True)
+    keys: Mapped[Optional[List[str]]] = mapped_column(JSONB, nullable=True)
+
+    # GIN по keys: поиск секретов по имени ключа через @>; триграммы по service_name: поиск подстроки
+    __table_args__ = (
+        Index('ix_secrets_keys_gin', 'keys', postgresql_using='gin', postgresql_ops={'keys': 'jsonb_path_ops'}),
+        Index(
+            'ix_secrets_service_name_trgm', 'service_name',
+            postgresql_using='gin', postgresql_ops={'service_name': 'gin_trgm_ops'}
+        ),
+    )
 
 
 class AccessRequest(Base):
@@ -47,10 +58,88 @@ class AccessRequest(Base):
     secret_id: Mapped[int] = mapped_column(Integer, ForeignKey('secrets.id'), nullable=False)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id'), nullable=False)
 
+    # Не больше одного pending запроса на пару (user, secret)
+    __table_args__ = (
+        Index(
+            'uq_accessrequests_pending_user_secret', 'user_id', 'secret_id',
+            unique=True, postgresql_where=text("status = 'pending'")
+        ),
+    )
+
 
 class AccessRecord(Base):
 
     expiration_date: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
 
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id'), nullable=False)
-    secret_id: Mapped[int] = mapped_column(Integer, ForeignKey('secrets.id'), nullable=False)
\ No newline at end of file
+    secret_id: Mapped[int] = mapped_column(Integer, ForeignKey('secrets.id'), nullable=False)
+
+class Group(Base):
+
+    name: Mapped[str] = mapped_column(String(100), unique=True, nullable=False)
+
+
+class GroupMember(Base):
+
+    group_id: Mapped[int] = mapped_column(Integer, ForeignKey('groups.id', ondelete='CASCADE'), nullable=False)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+
+    __table_args__ = (
+        UniqueConstraint('group_id', 'user_id', name='uq_groupmembers_group_user'),
+    )
+
+
+class GroupGrant(Base):
+    """Доступ группы к секрету: одна строка на команду, а не на каждого участника"""
+
+    expiration_date: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    group_id: Mapped[int] = mapped_column(Integer, ForeignKey('groups.id', ondelete='CASCADE'), nullable=False)
+    secret_id: Mapped[int] = mapped_column(Integer, ForeignKey('secrets.id'), nullable=False)
+
+    __table_args__ = (
+        Index('ix_groupgrants_group_secret', 'group_id', 'secret_id'),
+    )
+
+
+class PathGrant(Base):
+    """Доступ пользователя или группы к поддереву секретов по шаблону пути: 'payments/*', 'payments/*/prod'"""
+
+    pattern: Mapped[str] = mapped_column(String(100), nullable=False)
+    expiration_date: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    user_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=True, index=True)
+    group_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey('groups.id', ondelete='CASCADE'), nullable=True, index=True)
+
+    __table_args__ = (
+        CheckConstraint('(user_id IS NULL) <> (group_id IS NULL)', name='ck_pathgrants_owner'),
+    )
+
+
+class SecretReadEvent(Base):
+
+    read_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+    path: Mapped[str] = mapped_column(String(100), nullable=False)
+    client_ip: Mapped[Optional[str]] = mapped_column(String(45), nullable=True)
+    access_record_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id'), nullable=False, index=True)
+    secret_id: Mapped[int] = mapped_column(Integer, ForeignKey('secrets.id'), nullable=False, index=True)
+
+
+# Materialized view (миграция e5a0c3d9b7f2): отдельные metadata, чтобы autogenerate не создавал таблицу
+analytics_metadata = MetaData()
+
+secret_access_stats = Table(
+    'secret_access_stats',
+    analytics_metadata,
+    Column('secret_id', Integer, primary_key=True),
+    Column('service_name', String(100)),
+    Column('pending', BigInteger),
+    Column('approved', BigInteger),
+    Column('rejected', BigInteger),
+    Column('total', BigInteger),
+    Column('avg_approval_seconds', Float),
+    Column('active_grants', BigInteger),
+    Column('refreshed_at', DateTime(timezone=True)),
+)
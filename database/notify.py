@@ -0,0 +1,67 @@
+import json
+import logging
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from database.database import engine
+
+logger = logging.getLogger(__name__)
+
+# Идентификатор процесса: свои уведомления слушатель пропускает
+INSTANCE_ID = uuid.uuid4().hex
+
+Handler = Callable[[dict], Awaitable[None]]
+
+
+async def notify(channel: str, **payload) -> None:
+    """Отправить NOTIFY в канал Postgres всем экземплярам сервиса"""
+    payload["origin"] = INSTANCE_ID
+    async with engine.begin() as conn:
+        await conn.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": channel, "payload": json.dumps(payload)},
+        )
+
+
+class NotificationListener:
+    """LISTEN на выделенном соединении и вызов обработчиков по каналам"""
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._connection: Optional[AsyncConnection] = None
+
+    def subscribe(self, channel: str, handler: Handler) -> None:
+        self._handlers.setdefault(channel, []).append(handler)
+
+    async def start(self) -> None:
+        if self._connection is not None:
+            return
+        self._connection = await engine.connect()
+        raw = await self._connection.get_raw_connection()
+        for channel in self._handlers:
+            await raw.driver_connection.add_listener(channel, self._dispatch)
+
+    async def stop(self) -> None:
+        if self._connection is None:
+            return
+        await self._connection.close()
+        self._connection = None
+
+    async def _dispatch(self, connection, pid, channel, payload) -> None:
+        try:
+            data = json.loads(payload) if payload else {}
+        except ValueError:
+            data = {}
+        if data.get("origin") == INSTANCE_ID:
+            return
+        for handler in self._handlers.get(channel, []):
+            try:
+                await handler(data)
+            except Exception as e:
+                logger.exception("Error handling notification on %s", channel)
+
+
+listener = NotificationListener()
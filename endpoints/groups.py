@@ -0,0 +1,117 @@
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.exc import IntegrityError
+from starlette import status
+
+from core.dependencies import get_current_admin
+from dao.dao import GroupDAO, GroupMemberDAO, GroupGrantDAO, SecretDAO
+from dao.exceptions import ActiveAccessExists
+from models.groups import GroupCreate, GroupMembersRequest, GroupGrantRequest
+from models.user import AdminResponse
+
+group_router = APIRouter()
+
+
+async def get_group_or_404(group_id: int):
+    group = await GroupDAO.find_data_by_filter(id=group_id)
+    if not group:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Group not found"
+        )
+    return group
+
+
+@group_router.post('/')
+async def create_group(model: GroupCreate, current_admin: AdminResponse = Depends(get_current_admin)):
+    try:
+        return await GroupDAO.add(name=model.name)
+    except IntegrityError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Group '{model.name}' already exists"
+        )
+
+
+@group_router.get('/')
+async def list_groups(current_admin: AdminResponse = Depends(get_current_admin)):
+    return await GroupDAO.find_data_by_filter()
+
+
+@group_router.post('/{group_id}/members')
+async def add_group_members(
+        group_id: int,
+        model: GroupMembersRequest,
+        current_admin: AdminResponse = Depends(get_current_admin)
+):
+    """Добавить пользователей в группу; доступы группы действуют для них сразу"""
+    await get_group_or_404(group_id)
+    try:
+        added = await GroupMemberDAO.add_members(group_id, model.user_ids)
+    except IntegrityError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unknown user id in the list"
+        )
+    return {"group_id": group_id, "added": added}
+
+
+@group_router.delete('/{group_id}/members/{user_id}')
+async def remove_group_member(
+        group_id: int,
+        user_id: int,
+        current_admin: AdminResponse = Depends(get_current_admin)
+):
+    if not await GroupMemberDAO.remove_member(group_id, user_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User is not a member of this group"
+        )
+    return {"message": "Member removed"}
+
+
+@group_router.post('/{group_id}/grants')
+async def grant_group_access(
+        group_id: int,
+        model: GroupGrantRequest,
+        current_admin: AdminResponse = Depends(get_current_admin)
+):
+    """Одна запись доступа на всю группу вместо записи на каждого участника"""
+    await get_group_or_404(group_id)
+    if not await SecretDAO.find_by_id(model.secret_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Secret not found"
+        )
+    try:
+        grant = await GroupGrantDAO.grant(group_id, model.secret_id, model.access_period)
+    except ActiveAccessExists:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Group already has active access to this secret"
+        )
+    return {
+        "message": "Group access granted",
+        "group_grant": grant,
+        "expires_at": grant.expiration_date.isoformat()
+    }
+
+
+@group_router.delete('/grants/{grant_id}')
+async def revoke_group_access(grant_id: int, current_admin: AdminResponse = Depends(get_current_admin)):
+    grant = await GroupGrantDAO.find_data_by_filter(id=grant_id)
+    if not grant:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Group grant not found"
+        )
+    if grant.expiration_date <= datetime.now(timezone.utc):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Access already expired"
+        )
+    return {
+        "message": "Group access revoked",
+        "group_grant": await GroupGrantDAO.revoke(grant_id)
+    }
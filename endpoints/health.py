@@ -0,0 +1,31 @@
+import logging
+
+from fastapi import APIRouter, Response
+from starlette import status
+
+from core.lifecycle import lifecycle
+from endpoints.secrets import client
+
+logger = logging.getLogger(__name__)
+
+health_router = APIRouter()
+
+
+@health_router.get('/live')
+async def liveness():
+    return {"status": "ok"}
+
+
+@health_router.get('/ready')
+async def readiness(response: Response):
+    """503, пока не закончен прогрев или после начала остановки"""
+    if lifecycle.started and not lifecycle.draining and not lifecycle.checks.get("openbao", True):
+        # OpenBao мог быть недоступен при старте: перепроверяем, чтобы процесс мог стать ready
+        try:
+            await client.warm_up()
+            lifecycle.checks["openbao"] = True
+        except Exception as e:
+            logger.warning("OpenBao is still unavailable: %s", e)
+    if not lifecycle.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return lifecycle.stats()
@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+from starlette import status
+
+from core.analytics import analytics_refresher
+from core.audit import audit_log
+from core.dependencies import get_current_admin
+from core.lifecycle import lifecycle
+from core.log import logging_stats
+from core.loop_monitor import loop_monitor
+from core.profiling import profile_store
+from core.rate_limit import login_rate_limiter
+from dao.dao import dao_flight
+from dao.grants import grant_index
+from database.database import replica_router
+from endpoints.secrets import client
+from models.user import AdminResponse
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get('/')
+async def get_metrics(current_admin: AdminResponse = Depends(get_current_admin)):
+    """Счетчики внутренних подсистем процесса"""
+    return {
+        "lifecycle": lifecycle.stats(),
+        "event_loop_lag": loop_monitor.stats(),
+        "logging": logging_stats(),
+        "login_rate_limit": login_rate_limiter.stats(),
+        "audit": audit_log.stats(),
+        "analytics": analytics_refresher.stats(),
+        "grant_index": grant_index.stats(),
+        "db_replicas": replica_router.stats(),
+        "openbao_version_cache": client.version_cache_stats(),
+        "singleflight": {"dao": dao_flight.stats(), "openbao": client.flight.stats()},
+    }
+
+
+@metrics_router.get('/profiles')
+async def list_profiles(current_admin: AdminResponse = Depends(get_current_admin)):
+    """Последние профили запросов с заголовком X-Profile"""
+    return profile_store.list()
+
+
+@metrics_router.get('/profiles/{profile_id}', response_class=PlainTextResponse)
+async def get_profile(profile_id: str, current_admin: AdminResponse = Depends(get_current_admin)):
+    """Профиль в формате collapsed stacks: flamegraph.pl, speedscope, inferno"""
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Profile '{profile_id}' not found"
+        )
+    return profile["collapsed"]
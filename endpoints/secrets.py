@@ -1,35 +1,59 @@
-from datetime import timedelta, datetime
+import asyncio
+from datetime import timedelta, datetime, timezone
+from typing import Optional
 
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import SQLAlchemyError, TimeoutError as PoolTimeoutError
 from sqlalchemy.sql.annotation import Annotated
 from starlette import status
 
-from core import verify_password, create_access_token, get_password_hash
+from core import verify_and_check_rehash, rehash_password, create_access_token, get_password_hash
+from core import deadline
+from core.audit import audit_log
+from core.export import csv_chunks, ndjson_chunks
+from core.lifecycle import lifecycle
 from core.config import ACCESS_TOKEN_TTL_MINUTES
 from core.dependencies import get_current_active_user, get_current_user, get_current_admin
-from dao.dao import UserDAO, AdminDAO, SecretDAO, AccessRequestDAO, AccessRecordDAO
-from database.models import AccessStatus
-from models.secrets import ChangeStatusRequest
+from core.rate_limit import login_rate_limiter
+from dao.dao import UserDAO, AdminDAO, SecretDAO, AccessRequestDAO, AccessRecordDAO, SecretReadEventDAO, AnalyticsDAO
+from dao.dao import GroupDAO, PathGrantDAO
+from dao.exceptions import AccessRequestNotFound, AccessRequestAlreadyApproved, ActiveAccessExists
+from dao.exceptions import InvalidAccessPeriod
+from database.models import AccessStatus, AccessRecord, PathGrant
+from models.secrets import ChangeStatusRequest, PathGrantRequest, AccessCheckRequest
 from models.user import LoginRequest, Token, AdminResponse, AdminCreate, UserResponse
 from openbao_client import OpenBaoClient
 
 secret_router = APIRouter()
 client = OpenBaoClient()
 
-async def authenticate_user(username: str, password: str):
+IMMUTABLE_MAX_AGE_SECONDS = 365 * 24 * 3600
+
+async def authenticate_user(username: str, password: str, background_tasks: BackgroundTasks):
     user = await AdminDAO.find_data_by_filter(username=username)
     if not user:
         return False
-    if not verify_password(password, user.password_hash):
+    valid, needs_rehash = verify_and_check_rehash(password, user.password_hash)
+    if not valid:
         return False
+    if needs_rehash:
+        # Хэш со старыми параметрами argon2 — считаем новый и сохраняем после ответа
+        user_id = user.id
+        background_tasks.add_task(
+            rehash_password, password, lambda new_hash: AdminDAO.update_by_id(user_id, password_hash=new_hash)
+        )
     return user
 
 
 @secret_router.post("/login", response_model=Token)
 async def login_for_access_token(
-        login_data: LoginRequest
+        login_data: LoginRequest,
+        request: Request,
+        background_tasks: BackgroundTasks
 ):
-    user = await authenticate_user(login_data.username, login_data.password)
+    login_rate_limiter.check(request, "admin", login_data.username)
+    user = await authenticate_user(login_data.username, login_data.password, background_tasks)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -43,9 +67,12 @@ async def login_for_access_token(
     return Token(access_token=access_token, token_type="bearer")
 
 
-@secret_router.get("/secret/{path}")
+@secret_router.get("/secret/{path:path}")
 async def get_secret(
         path: str,
+        request: Request,
+        response: Response,
+        version: Optional[int] = Query(None, ge=1, description="Версия KV v2; по умолчанию последняя"),
         current_user: UserResponse = Depends(get_current_active_user)
 ):
     try:
@@ -58,7 +85,8 @@ async def get_secret(
 
         active_access = await AccessRecordDAO.get_active_access(
             user_id=current_user.id,
-            secret_id=secret_record.id
+            secret_id=secret_record.id,
+            path=secret_record.service_name
         )
 
         if not active_access:
@@ -79,36 +107,180 @@ async def get_secret(
                 )
 
         # Получаем секрет из OpenBao/Vault
-        secret = client.read_secret(path)
+        secret = await client.read_secret_async(path, version=version)
+        if version is not None:
+            # Версия неизменяема; кэш у клиента не дольше срока доступа
+            max_age = int((active_access.expiration_date - datetime.now(timezone.utc)).total_seconds())
+            max_age = max(0, min(max_age, IMMUTABLE_MAX_AGE_SECONDS))
+            response.headers["Cache-Control"] = f"private, max-age={max_age}, immutable"
+        # Доступ через группу или шаблон пути: в аудите нет личной записи, в ответе — id этого доступа
+        personal = isinstance(active_access, AccessRecord)
+        audit_log.record_read(
+            user_id=current_user.id,
+            secret_id=secret_record.id,
+            path=path,
+            access_record_id=active_access.id if personal else None,
+            client_ip=request.client.host if request.client else None
+        )
+        access_info = {"expires_at": active_access.expiration_date.isoformat()}
+        if personal:
+            access_info["access_record_id"] = active_access.id
+        elif isinstance(active_access, PathGrant):
+            access_info.update(pattern=active_access.pattern, path_grant_id=active_access.id)
+        else:
+            access_info.update(group_id=active_access.group_id, group_grant_id=active_access.id)
         return {
             "data": secret["data"]["data"],
-            "access_info": {
-                "expires_at": active_access.expiration_date.isoformat(),
-                "access_record_id": active_access.id
-            }
+            "version": secret["data"]["metadata"]["version"],
+            "access_info": access_info
         }
 
-    except HTTPException:
+    except (HTTPException, deadline.DeadlineExceeded, PoolTimeoutError):
         raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@secret_router.put("/secret/{path}")
+@secret_router.post("/check")
+async def check_access(model: AccessCheckRequest, current_user: UserResponse = Depends(get_current_active_user)):
+    """Решения allow/deny/expired для списка путей без чтения секретов из OpenBao.
+    Секреты и личные доступы — одним запросом, групповые и по шаблону — из индекса в памяти
+    (без индекса — еще два запроса на весь список)"""
+    paths = list(dict.fromkeys(model.paths))
+    latest = await AccessRecordDAO.latest_by_paths(current_user.id, paths)
+    now = datetime.now(timezone.utc)
+    without_personal = {
+        path: secret_id for path, (secret_id, expires_at) in latest.items()
+        if expires_at is None or expires_at <= now
+    }
+    shared = await AccessRecordDAO.shared_access_by_paths(current_user.id, without_personal)
+    results = []
+    for path in paths:
+        secret_id, expires_at = latest.get(path, (None, None))
+        if secret_id is None:
+            decision, expires_at = "deny", None
+        elif path not in without_personal:
+            decision = "allow"
+        elif path in shared:
+            decision, expires_at = "allow", shared[path].expiration_date
+        else:
+            # Как в GET /secret: была личная запись — expired, не было — deny
+            decision = "expired" if expires_at is not None else "deny"
+        results.append({
+            "path": path,
+            "decision": decision,
+            "expires_at": expires_at.isoformat() if expires_at is not None else None
+        })
+    return {"results": results}
+
+
+@secret_router.put("/secret/{path:path}")
 async def create_secret(path: str, payload: dict, current_admin : AdminResponse = Depends(get_current_admin)):
-    data = await SecretDAO.find_data_by_filter(service_name=path)
+    data = await SecretDAO.find_by_path(path)
     if not data:
         try:
-            client.write_secret(path, payload)
+            await client.write_secret_async(path, payload)
             await SecretDAO.add(service_name=path,
                                 keys=list(payload.keys()))
             return {"status": "ok", "path": path}
+        except (deadline.DeadlineExceeded, PoolTimeoutError):
+            raise
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
     else : raise HTTPException(status_code=400, detail="current path already exist")
 
 
-import asyncio
-from typing import Optional
+@secret_router.get("/search/keys")
+async def search_secrets_by_key(
+    key: str = Query(..., min_length=1, description="Имя ключа внутри секрета, например DB_PASSWORD"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[int] = Query(None, description="next_cursor из предыдущей страницы"),
+    current_admin: AdminResponse = Depends(get_current_admin)
+):
+    """Поиск секретов, в которых есть ключ с заданным именем"""
+    secrets = await SecretDAO.search_by_key(key, limit=limit, after_id=cursor)
+    return {
+        "secrets": secrets,
+        "next_cursor": secrets[-1].id if len(secrets) == limit else None
+    }
+
+
+EXPORT_DAOS = {
+    "requests": AccessRequestDAO,
+    "records": AccessRecordDAO,
+}
+
+
+@secret_router.get("/export/{table}")
+async def export_access_history(
+    table: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    current_admin: AdminResponse = Depends(get_current_admin)
+):
+    """Выгрузка всей истории AccessRequest/AccessRecord потоком (NDJSON или CSV)"""
+    dao = EXPORT_DAOS.get(table)
+    if dao is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown export table '{table}', expected one of: {', '.join(EXPORT_DAOS)}"
+        )
+
+    # Выгрузка может идти дольше дедлайна запроса; каждый FETCH ограничен statement_timeout
+    deadline.clear()
+    batches = dao.stream_rows()
+    if format == "csv":
+        columns = [column.key for column in dao.model.__table__.c]
+        body, media_type = csv_chunks(columns, batches), "text/csv"
+    else:
+        body, media_type = ndjson_chunks(batches), "application/x-ndjson"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{table}.{format}"'}
+    )
+
+
+@secret_router.get("/analytics")
+async def get_access_analytics(
+    top: int = Query(10, ge=1, le=100),
+    current_admin: AdminResponse = Depends(get_current_admin)
+):
+    """Счетчики запросов по статусам, спрос по секретам и задержка одобрения.
+    Данные из materialized view, обновляемого по расписанию (см. refreshed_at)"""
+    return {
+        "totals": await AnalyticsDAO.totals(),
+        "top_secrets": await AnalyticsDAO.top_secrets(limit=top)
+    }
+
+
+@secret_router.get("/audit")
+async def get_audit_events(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    user_id: Optional[int] = None,
+    secret_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[int] = Query(None, description="next_cursor из предыдущей страницы"),
+    current_admin: AdminResponse = Depends(get_current_admin)
+):
+    """Журнал чтений секретов за период [since, until), новые сначала"""
+    filters = {}
+    if user_id is not None:
+        filters["user_id"] = user_id
+    if secret_id is not None:
+        filters["secret_id"] = secret_id
+
+    events = await SecretReadEventDAO.find_page(
+        since=since,
+        until=until,
+        before_id=cursor,
+        limit=limit,
+        **filters
+    )
+    return {
+        "events": events,
+        "next_cursor": events[-1].id if len(events) == limit else None
+    }
 
 
 @secret_router.get("/requests")
@@ -127,56 +299,59 @@ async def get_access_requests(
     """
 
     start_time = asyncio.get_event_loop().time()
-
-    while True:
-        # Получаем текущие запросы
-        current_requests = await AccessRequestDAO.find_all()
-
-        # фильтрация по статусу, если задан query параметр
-        if status:
-            current_requests = [
-                req for req in current_requests if req.status == status
-            ]
-
-        # Проверяем наличие last_update
-        if last_update:
-            try:
-                last_update_dt = datetime.fromisoformat(last_update.replace("Z", "+00:00"))
-                changed_requests = [
-                    req for req in current_requests
-                    if req.update_at > last_update_dt
+    deadline.extend(timeout)
+
+    # Регистрация нужна для мягкой остановки: ответ отдается сразу, а не по таймауту
+    async with lifecycle.long_poll():
+        while True:
+            # Получаем текущие запросы
+            current_requests = await AccessRequestDAO.find_all()
+
+            # фильтрация по статусу, если задан query параметр
+            if status:
+                current_requests = [
+                    req for req in current_requests if req.status == status
                 ]
 
-                if changed_requests:
+            # Проверяем наличие last_update
+            if last_update:
+                try:
+                    last_update_dt = datetime.fromisoformat(last_update.replace("Z", "+00:00"))
+                    changed_requests = [
+                        req for req in current_requests
+                        if req.update_at > last_update_dt
+                    ]
+
+                    if changed_requests:
+                        return {
+                            "requests": current_requests,
+                            "last_update": datetime.now().isoformat(),
+                            "has_changes": True
+                        }
+                except ValueError:
                     return {
                         "requests": current_requests,
                         "last_update": datetime.now().isoformat(),
                         "has_changes": True
                     }
-            except ValueError:
+            else:
                 return {
                     "requests": current_requests,
                     "last_update": datetime.now().isoformat(),
                     "has_changes": True
                 }
-        else:
-            return {
-                "requests": current_requests,
-                "last_update": datetime.now().isoformat(),
-                "has_changes": True
-            }
-
-        # Проверяем таймаут
-        elapsed_time = asyncio.get_event_loop().time() - start_time
-        if elapsed_time >= timeout:
-            return {
-                "requests": current_requests,
-                "last_update": last_update or datetime.now().isoformat(),
-                "has_changes": False,
-                "timeout": True
-            }
-
-        await asyncio.sleep(2)
+
+            # Проверяем таймаут
+            elapsed_time = asyncio.get_event_loop().time() - start_time
+            if elapsed_time >= timeout or lifecycle.draining:
+                return {
+                    "requests": current_requests,
+                    "last_update": last_update or datetime.now().isoformat(),
+                    "has_changes": False,
+                    "timeout": True
+                }
+
+            await lifecycle.wait_draining(2)
 
 @secret_router.post('/requests/change_status')
 async def change_status_access_request(
@@ -185,67 +360,115 @@ async def change_status_access_request(
 ):
     """Изменить статус запроса доступа и создать AccessRecord при одобрении"""
 
-    # Находим запрос
-    access_request = await AccessRequestDAO.find_one(id=change_data.request_id)
-    if not access_request:
+    try:
+        updated_request, access_record = await AccessRequestDAO.change_status(
+            request_id=change_data.request_id,
+            status=change_data.new_status,
+            response_message=change_data.response_message
+        )
+    except AccessRequestNotFound:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Access request not found"
         )
-
-    # Проверяем, не одобрен ли уже этот запрос
-    if access_request.status == AccessStatus.APPROVED:
+    except AccessRequestAlreadyApproved:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="This request is already approved"
         )
-
-    # Обновляем статус
-    updated_request = await AccessRequestDAO.update_status(
-        request_id=change_data.request_id,
-        status=change_data.new_status,
-        response_message=change_data.response_message
-    )
+    except ActiveAccessExists:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User already has active access to this secret"
+        )
+    except InvalidAccessPeriod:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Access request has no valid access period"
+        )
+    except (deadline.DeadlineExceeded, PoolTimeoutError):
+        raise
+    except SQLAlchemyError:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to update access request"
+        )
 
     response_data = {
         "message": f"Access request status updated to {change_data.new_status.value}",
         "request": updated_request
     }
 
-    # Если статус APPROVED - создаем запись в AccessRecord
-    if change_data.new_status == AccessStatus.APPROVED:
-        # Проверяем, нет ли уже активного доступа
-        existing_access = await AccessRecordDAO.find_active_by_user_and_secret(
-            user_id=access_request.user_id,
-            secret_id=access_request.secret_id
-        )
+    if access_record:
+        response_data.update({
+            "message": "Access request approved and access record created",
+            "access_record": access_record,
+            "expires_at": access_record.expiration_date.isoformat()
+        })
 
-        if existing_access:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="User already has active access to this secret"
-            )
+    return response_data
 
-        # Вычисляем дату истечения
-        expiration_date = datetime.now() + timedelta(days=access_request.access_period)
 
-        # Создаем запись о доступе
-        access_record = await AccessRecordDAO.add(
-            user_id=access_request.user_id,
-            secret_id=access_request.secret_id,
-            expiration_date=expiration_date
+@secret_router.delete('/records/{record_id}')
+async def revoke_access_record(
+        record_id: int,
+        current_admin: AdminResponse = Depends(get_current_admin)
+):
+    """Отозвать активный доступ пользователя к секрету"""
+    access_record = await AccessRecordDAO.find_data_by_filter(id=record_id)
+    if not access_record:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Access record not found"
+        )
+    if access_record.expiration_date <= datetime.now(timezone.utc):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Access already expired"
         )
 
-        if not access_record:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to create access record"
-            )
+    revoked_record = await AccessRecordDAO.revoke(record_id)
+    return {
+        "message": "Access revoked",
+        "access_record": revoked_record
+    }
 
-        response_data.update({
-            "message": "Access request approved and access record created",
-            "access_record": access_record,
-            "expires_at": expiration_date.isoformat()
-        })
 
-    return response_data
+@secret_router.post('/path-grants')
+async def grant_path_access(model: PathGrantRequest, current_admin: AdminResponse = Depends(get_current_admin)):
+    """Доступ пользователя или группы ко всем секретам, чьи пути подходят под шаблон"""
+    if model.group_id is not None and not await GroupDAO.find_data_by_filter(id=model.group_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Group not found"
+        )
+    if model.user_id is not None and not await UserDAO.find_data_by_filter(id=model.user_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    grant = await PathGrantDAO.grant(model.pattern, model.access_period, user_id=model.user_id, group_id=model.group_id)
+    return {
+        "message": "Path access granted",
+        "path_grant": grant,
+        "expires_at": grant.expiration_date.isoformat()
+    }
+
+
+@secret_router.delete('/path-grants/{grant_id}')
+async def revoke_path_access(grant_id: int, current_admin: AdminResponse = Depends(get_current_admin)):
+    grant = await PathGrantDAO.find_data_by_filter(id=grant_id)
+    if not grant:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Path grant not found"
+        )
+    if grant.expiration_date <= datetime.now(timezone.utc):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Access already expired"
+        )
+    return {
+        "message": "Path access revoked",
+        "path_grant": await PathGrantDAO.revoke(grant_id)
+    }
@@ -1,11 +1,14 @@
 from datetime import timedelta
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError, TimeoutError as PoolTimeoutError
 
-from core.security import verify_password, create_access_token, get_password_hash
+from core import deadline
+from core.security import verify_and_check_rehash, rehash_password, create_access_token, get_password_hash
 from core.config import ACCESS_TOKEN_TTL_MINUTES
 from core.dependencies import get_current_active_user
+from core.rate_limit import login_rate_limiter
 from dao.dao import UserDAO, AccessRequestDAO, SecretDAO, AccessRecordDAO
 from database.models import AccessRequest, AccessStatus
 from models.user import UserResponse, UserCreate, Token, LoginRequest, AccessRequestModel
@@ -77,20 +80,30 @@ async def add_user(user: UserCreate):
     )
 
 
-async def authenticate_user(username: str, password: str):
+async def authenticate_user(username: str, password: str, background_tasks: BackgroundTasks):
     user = await UserDAO.find_by_username(username=username)
     if not user:
         return False
-    if not verify_password(password, user.password_hash):
+    valid, needs_rehash = verify_and_check_rehash(password, user.password_hash)
+    if not valid:
         return False
+    if needs_rehash:
+        # Хэш со старыми параметрами argon2 — считаем новый и сохраняем после ответа
+        user_id = user.id
+        background_tasks.add_task(
+            rehash_password, password, lambda new_hash: UserDAO.update_by_id(user_id, password_hash=new_hash)
+        )
     return user
 
 
 @user_router.post("/login", response_model=Token)
 async def login_for_access_token(
-        login_data: LoginRequest  # Используем LoginRequest вместо Annotated
+        login_data: LoginRequest,  # Используем LoginRequest вместо Annotated
+        request: Request,
+        background_tasks: BackgroundTasks
 ):
-    user = await authenticate_user(login_data.username, login_data.password)
+    login_rate_limiter.check(request, "user", login_data.username)
+    user = await authenticate_user(login_data.username, login_data.password, background_tasks)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -116,61 +129,79 @@ async def send_access_request(
         model: AccessRequestModel,
         current_user: Annotated[UserResponse, Depends(get_current_active_user)]
 ):
-    secret = await SecretDAO.find_data_by_filter(id=model.secret_id)
+    secret = await SecretDAO.find_by_id(model.secret_id)
     if not secret:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Secret not found"
         )
-    # Проверяем, есть ли уже pending запрос
-    has_pending = await AccessRequestDAO.has_pending_request(
-        user_id=current_user.id,
-        secret_id=model.secret_id
-    )
 
-    if has_pending:
+    # Один запрос: уникальный индекс по pending и проверка approved внутри INSERT
+    try:
+        new_access = await AccessRequestDAO.create_pending(
+            user_id=current_user.id,
+            secret_id=model.secret_id,
+            request_data=model.request_data,
+            access_period=model.access_period,
+            access_reason=model.access_reason
+        )
+    except IntegrityError:
+        # Секрет удален между проверкой каталога и вставкой (FK)
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="You already have a pending access request for this secret. Please wait for the current request to be processed."
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Secret not found"
         )
-
-    # Также можно проверить, есть ли уже approved запрос
-    existing_approved_request = await AccessRequestDAO.find_one(
-        user_id=current_user.id,
-        secret_id=model.secret_id,
-        status=AccessStatus.APPROVED
-    )
-
-    if existing_approved_request:
+    except (deadline.DeadlineExceeded, PoolTimeoutError):
+        # TimeoutError пула — тоже SQLAlchemyError: без этой ветки перегрузка превратилась бы в 500 вместо 503
+        raise
+    except SQLAlchemyError:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="You already have approved access to this secret"
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to create access request"
         )
 
-    # Создаем новый запрос
-    new_access = await AccessRequestDAO.add(
-        request_data=model.request_data,
-        access_period=model.access_period,
-        access_reason=model.access_reason,
-        secret_id=model.secret_id,
-        user_id=current_user.id,
-        status=AccessStatus.PENDING
-    )
-
     if not new_access:
+        # Вставка не прошла — выясняем причину только на этом (редком) пути
+        if await AccessRequestDAO.has_approved_request(
+            user_id=current_user.id,
+            secret_id=model.secret_id
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="You already have approved access to this secret"
+            )
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to create access request"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="You already have a pending access request for this secret. Please wait for the current request to be processed."
         )
 
     return new_access
 
 
 @user_router.get('/secrets')
-async def get_access_secrets(current_user: Annotated[UserResponse, Depends(get_current_active_user)]):
-    return await SecretDAO.find_data_by_filter()
+async def get_access_secrets(
+        current_user: Annotated[UserResponse, Depends(get_current_active_user)],
+        response: Response,
+        q: Optional[str] = Query(None, min_length=3, max_length=100, description="Подстрока service_name (от 3 символов — триграммный индекс)"),
+        limit: Optional[int] = Query(None, ge=1, le=1000),
+        cursor: Optional[int] = Query(None, description="Значение заголовка X-Next-Cursor предыдущей страницы")
+):
+    # Без параметров — весь каталог, как раньше
+    if q is None and limit is None:
+        return await SecretDAO.find_all()
+
+    limit = limit or 50
+    if q is not None:
+        secrets = await SecretDAO.search_by_name(q, limit=limit, after_id=cursor)
+    else:
+        secrets = await SecretDAO.find_page(limit=limit, after_id=cursor)
+
+    if len(secrets) == limit:
+        response.headers["X-Next-Cursor"] = str(secrets[-1].id)
+    return secrets
 
 
 @user_router.get('/allowed_secrets')
 async def get_access_secrets(current_user: Annotated[UserResponse, Depends(get_current_active_user)]):
-    return await AccessRecordDAO.find_active_by_user(user_id=current_user.id)
+    """Действующие доступы: личные записи, групповые (group_id) и шаблоны путей (pattern) — то же, что разрешает GET /secret"""
+    return await AccessRecordDAO.find_effective_by_user(user_id=current_user.id)
@@ -1,11 +1,87 @@
+import logging
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 
-from endpoints.secrets import secret_router
+from core.analytics import analytics_refresher
+from core.audit import audit_log
+from core.config import DB_WARM_CONNECTIONS, SHUTDOWN_DRAIN_SECONDS
+from core.deadline import DeadlineExceeded, DeadlineMiddleware, deadline_exceeded_handler, pool_timeout_handler
+from core.lifecycle import lifecycle
+from core.log import RequestIdMiddleware, setup_logging, stop_logging
+from core.loop_monitor import loop_monitor
+from core.profiling import ProfilingMiddleware
+from dao.catalog import secret_catalog
+from dao.grants import grant_index
+from database.database import dispose_engines, engine, replica_engines, warm_up_pool
+from database.notify import listener
+from endpoints.groups import group_router
+from endpoints.health import health_router
+from endpoints.metrics import metrics_router
+from endpoints.secrets import client, secret_router
 from endpoints.users import user_router
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+
+async def warm_up() -> None:
+    """Соединения с БД и OpenBao до первого запроса; ошибки OpenBao не валят старт, но держат ready=false"""
+    await warm_up_pool(engine, DB_WARM_CONNECTIONS)
+    for replica in replica_engines:
+        try:
+            await warm_up_pool(replica, DB_WARM_CONNECTIONS)
+        except Exception as e:
+            logger.warning("Replica warm-up failed: %s", e)
+    try:
+        await client.warm_up()
+        lifecycle.checks["openbao"] = True
+    except Exception as e:
+        lifecycle.checks["openbao"] = False
+        logger.warning("OpenBao warm-up failed: %s", e)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # После конфигурации логов uvicorn: его логгеры тоже уходят в JSON через очередь
+    setup_logging(rate_limit=True)
+    lifecycle.install_signal_handlers(SHUTDOWN_DRAIN_SECONDS)
+    # Первым: блокирующие вызовы прогрева тоже попадут в статистику
+    await loop_monitor.start()
+    await warm_up()
+    # Подписки регистрируем до LISTEN, снимки грузим после — чтобы не пропустить изменения
+    secret_catalog.subscribe()
+    grant_index.subscribe()
+    await listener.start()
+    await secret_catalog.refresh()
+    await grant_index.load()
+    await grant_index.start()
+    await audit_log.start()
+    await analytics_refresher.start()
+    lifecycle.started = True
+    yield
+    if not await lifecycle.drain(SHUTDOWN_DRAIN_SECONDS):
+        logger.warning("Shutdown with %d long-poll requests still in flight", lifecycle.long_polls)
+    await analytics_refresher.stop()
+    # Аудит после drain: события последних запросов успевают попасть в очередь
+    await audit_log.stop()
+    await grant_index.stop()
+    await listener.stop()
+    await dispose_engines()
+    await loop_monitor.stop()
+    stop_logging()
+
+
+app = FastAPI(lifespan=lifespan)
+
+app.add_middleware(DeadlineMiddleware)
+# Снаружи дедлайна: проверка администратора не тратит бюджет запроса
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(RequestIdMiddleware)
+app.add_exception_handler(DeadlineExceeded, deadline_exceeded_handler)
+app.add_exception_handler(PoolTimeoutError, pool_timeout_handler)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,6 +93,9 @@ app.add_middleware(
 
 app.include_router(user_router, prefix='/users')
 app.include_router(secret_router, prefix='/secrets', tags=["openbao"])
+app.include_router(group_router, prefix='/groups', tags=["groups"])
+app.include_router(metrics_router, prefix='/metrics', tags=["metrics"])
+app.include_router(health_router, prefix='/health', tags=["health"])
 
 if __name__ == '__main__':
     uvicorn.run(app=app, host='127.0.0.1', port=8000)
@@ -0,0 +1,47 @@
+"""secret read audit
+
+Revision ID: 5d1f0c7b2a94
+Revises: 3e4e7a756e0b
+Create Date: 2026-10-19 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d1f0c7b2a94'
+down_revision: Union[str, Sequence[str], None] = '3e4e7a756e0b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('secretreadevents',
+    sa.Column('read_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('path', sa.String(length=100), nullable=False),
+    sa.Column('client_ip', sa.String(length=45), nullable=True),
+    sa.Column('access_record_id', sa.Integer(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('secret_id', sa.Integer(), nullable=False),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('update_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['secret_id'], ['secrets.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_secretreadevents_read_at'), 'secretreadevents', ['read_at'], unique=False)
+    op.create_index(op.f('ix_secretreadevents_secret_id'), 'secretreadevents', ['secret_id'], unique=False)
+    op.create_index(op.f('ix_secretreadevents_user_id'), 'secretreadevents', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_secretreadevents_user_id'), table_name='secretreadevents')
+    op.drop_index(op.f('ix_secretreadevents_secret_id'), table_name='secretreadevents')
+    op.drop_index(op.f('ix_secretreadevents_read_at'), table_name='secretreadevents')
+    op.drop_table('secretreadevents')
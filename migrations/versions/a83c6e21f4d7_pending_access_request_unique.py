@@ -0,0 +1,42 @@
+"""pending access request unique
+
+Revision ID: a83c6e21f4d7
+Revises: 5d1f0c7b2a94
+Create Date: 2026-10-19 11:02:15.604127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a83c6e21f4d7'
+down_revision: Union[str, Sequence[str], None] = '5d1f0c7b2a94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Дубликаты pending, созданные до индекса, закрываем: остается самый ранний запрос
+    op.execute("""
+        UPDATE accessrequests
+        SET status = 'rejected', response_message = 'Duplicate pending request'
+        WHERE status = 'pending'
+          AND id NOT IN (
+              SELECT min(id) FROM accessrequests
+              WHERE status = 'pending'
+              GROUP BY user_id, secret_id
+          )
+    """)
+    op.create_index(
+        'uq_accessrequests_pending_user_secret', 'accessrequests', ['user_id', 'secret_id'],
+        unique=True, postgresql_where=sa.text("status = 'pending'")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_accessrequests_pending_user_secret', table_name='accessrequests')
@@ -0,0 +1,44 @@
+"""path grants
+
+Revision ID: b7d4e2a9c1f5
+Revises: f3b8d21c6a47
+Create Date: 2026-10-19 16:42:37.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d4e2a9c1f5'
+down_revision: Union[str, Sequence[str], None] = 'f3b8d21c6a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('pathgrants',
+    sa.Column('pattern', sa.String(length=100), nullable=False),
+    sa.Column('expiration_date', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('group_id', sa.Integer(), nullable=True),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('update_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.CheckConstraint('(user_id IS NULL) <> (group_id IS NULL)', name='ck_pathgrants_owner'),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_pathgrants_group_id'), 'pathgrants', ['group_id'], unique=False)
+    op.create_index(op.f('ix_pathgrants_user_id'), 'pathgrants', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_pathgrants_user_id'), table_name='pathgrants')
+    op.drop_index(op.f('ix_pathgrants_group_id'), table_name='pathgrants')
+    op.drop_table('pathgrants')
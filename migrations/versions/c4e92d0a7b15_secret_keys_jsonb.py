@@ -0,0 +1,40 @@
+"""secret keys jsonb
+
+Revision ID: c4e92d0a7b15
+Revises: a83c6e21f4d7
+Create Date: 2026-10-19 12:34:08.915532
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e92d0a7b15'
+down_revision: Union[str, Sequence[str], None] = 'a83c6e21f4d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column('secrets', 'keys',
+               existing_type=sa.JSON(),
+               type_=postgresql.JSONB(astext_type=sa.Text()),
+               existing_nullable=True,
+               postgresql_using='keys::jsonb')
+    op.create_index('ix_secrets_keys_gin', 'secrets', ['keys'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'keys': 'jsonb_path_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_secrets_keys_gin', table_name='secrets', postgresql_using='gin')
+    op.alter_column('secrets', 'keys',
+               existing_type=postgresql.JSONB(astext_type=sa.Text()),
+               type_=sa.JSON(),
+               existing_nullable=True,
+               postgresql_using='keys::json')
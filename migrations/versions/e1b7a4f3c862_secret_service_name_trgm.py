@@ -0,0 +1,30 @@
+"""secret service name trgm
+
+Revision ID: e1b7a4f3c862
+Revises: c4e92d0a7b15
+Create Date: 2026-10-19 13:20:47.208846
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1b7a4f3c862'
+down_revision: Union[str, Sequence[str], None] = 'c4e92d0a7b15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_secrets_service_name_trgm', 'secrets', ['service_name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'service_name': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_secrets_service_name_trgm', table_name='secrets', postgresql_using='gin')
@@ -0,0 +1,50 @@
+"""secret access stats view
+
+Revision ID: e5a0c3d9b7f2
+Revises: e1b7a4f3c862
+Create Date: 2026-10-19 14:05:31.774019
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a0c3d9b7f2'
+down_revision: Union[str, Sequence[str], None] = 'e1b7a4f3c862'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        CREATE MATERIALIZED VIEW secret_access_stats AS
+        SELECT
+            s.id AS secret_id,
+            s.service_name,
+            count(r.id) FILTER (WHERE r.status = 'pending') AS pending,
+            count(r.id) FILTER (WHERE r.status = 'approved') AS approved,
+            count(r.id) FILTER (WHERE r.status = 'rejected') AS rejected,
+            count(r.id) AS total,
+            avg(extract(epoch FROM r.update_at - r.created_at)) FILTER (WHERE r.status = 'approved')
+                AS avg_approval_seconds,
+            (
+                SELECT count(*) FROM accessrecords g
+                WHERE g.secret_id = s.id AND g.expiration_date > now()
+            ) AS active_grants,
+            now() AS refreshed_at
+        FROM secrets s
+        LEFT JOIN accessrequests r ON r.secret_id = s.id
+        GROUP BY s.id, s.service_name
+    """)
+    # Уникальный индекс нужен для REFRESH MATERIALIZED VIEW CONCURRENTLY
+    op.execute('CREATE UNIQUE INDEX ux_secret_access_stats_secret_id ON secret_access_stats (secret_id)')
+    op.execute('CREATE INDEX ix_secret_access_stats_total ON secret_access_stats (total DESC)')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP MATERIALIZED VIEW IF EXISTS secret_access_stats')
@@ -0,0 +1,63 @@
+"""groups and group grants
+
+Revision ID: f3b8d21c6a47
+Revises: e5a0c3d9b7f2
+Create Date: 2026-10-19 14:05:12.518733
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8d21c6a47'
+down_revision: Union[str, Sequence[str], None] = 'e5a0c3d9b7f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('groups',
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('update_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_table('groupmembers',
+    sa.Column('group_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('update_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('group_id', 'user_id', name='uq_groupmembers_group_user')
+    )
+    op.create_index(op.f('ix_groupmembers_user_id'), 'groupmembers', ['user_id'], unique=False)
+    op.create_table('groupgrants',
+    sa.Column('expiration_date', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('group_id', sa.Integer(), nullable=False),
+    sa.Column('secret_id', sa.Integer(), nullable=False),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('update_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['secret_id'], ['secrets.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_groupgrants_group_secret', 'groupgrants', ['group_id', 'secret_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_groupgrants_group_secret', table_name='groupgrants')
+    op.drop_table('groupgrants')
+    op.drop_index(op.f('ix_groupmembers_user_id'), table_name='groupmembers')
+    op.drop_table('groupmembers')
+    op.drop_table('groups')
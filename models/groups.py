@@ -0,0 +1,16 @@
+from typing import List
+
+from pydantic import BaseModel, Field
+
+
+class GroupCreate(BaseModel):
+    name: str = Field(min_length=1, max_length=100)
+
+
+class GroupMembersRequest(BaseModel):
+    user_ids: List[int] = Field(min_length=1)
+
+
+class GroupGrantRequest(BaseModel):
+    secret_id: int
+    access_period: int = Field(gt=0, description="Срок доступа в днях")
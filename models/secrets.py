@@ -1,9 +1,35 @@
-from pydantic import BaseModel
+from typing import Annotated, List, Optional
 
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from dao.path_trie import split_pattern
 from database.models import AccessStatus
 
 
 class ChangeStatusRequest(BaseModel):
     request_id: int
     new_status: AccessStatus
-    response_message: str = None
\ No newline at end of file
+    response_message: str = None
+
+
+class PathGrantRequest(BaseModel):
+    pattern: str = Field(max_length=100, description="Путь или шаблон: 'payments/*', 'payments/*/prod'")
+    user_id: Optional[int] = None
+    group_id: Optional[int] = None
+    access_period: int = Field(gt=0, description="Срок доступа в днях")
+
+    @field_validator("pattern")
+    @classmethod
+    def check_pattern(cls, pattern: str) -> str:
+        return "/".join(split_pattern(pattern))
+
+    @model_validator(mode="after")
+    def check_owner(self):
+        if (self.user_id is None) == (self.group_id is None):
+            raise ValueError("Exactly one of user_id and group_id is required")
+        return self
+
+
+class AccessCheckRequest(BaseModel):
+    # Длина пути — как у Secret.service_name
+    paths: List[Annotated[str, Field(max_length=100)]] = Field(min_length=1, max_length=500)
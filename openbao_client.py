@@ -1,7 +1,14 @@
+import asyncio
 import os
+from collections import OrderedDict
+from typing import Optional
+
 import hvac
 from dotenv import load_dotenv
 
+from core import deadline
+from core.singleflight import SingleFlight
+
 load_dotenv()
 
 class OpenBaoClient:
@@ -10,19 +17,68 @@ class OpenBaoClient:
         self.token = os.getenv("OPENBAO_TOKEN")
         self.verify = os.getenv("VERIFY_TLS", "false").lower() == "true"
         self.mount = os.getenv("MOUNT", "secret")
+        self.version_cache_size = int(os.getenv("OPENBAO_VERSION_CACHE_SIZE", "1024"))
+        # Таймаут HTTP-запроса к OpenBao: без него зависший сервер держит поток бесконечно
+        self.timeout = float(os.getenv("OPENBAO_TIMEOUT_SECONDS", "5"))
 
         self.client = hvac.Client(
             url=self.addr,
             token=self.token,
-            verify=self.verify
+            verify=self.verify,
+            timeout=self.timeout
         )
+        self.flight = SingleFlight()
+        # Версии KV v2 неизменяемы: кэш (path, version) без TTL, вытеснение LRU по размеру
+        self._versions: "OrderedDict[tuple, dict]" = OrderedDict()
+        self.version_cache_hits = 0
 
-    def read_secret(self, path: str):
+    def read_secret(self, path: str, version: Optional[int] = None):
         return self.client.secrets.kv.v2.read_secret_version(
             path=path,
+            version=version,
             mount_point=self.mount
         )
 
+    async def read_secret_async(self, path: str, version: Optional[int] = None):
+        """Чтение вне event loop; конкурентные чтения одного path объединяются в один запрос.
+        Явно запрошенная версия кэшируется"""
+        key = (path, version)
+        if version is not None:
+            cached = self._versions.get(key)
+            if cached is not None:
+                self._versions.move_to_end(key)
+                self.version_cache_hits += 1
+                return cached
+
+        # Дедлайн ограничивает ожидание этого запроса; общий вызов в потоке ограничен self.timeout
+        async with deadline.bounded():
+            secret = await self.flight.do(
+                ("read", path, version),
+                lambda: asyncio.to_thread(self.read_secret, path, version)
+            )
+
+        metadata = secret["data"]["metadata"]
+        # Удаленные/уничтоженные версии не кэшируем
+        if version is not None and not metadata.get("deletion_time") and not metadata.get("destroyed"):
+            self._versions[key] = secret
+            if len(self._versions) > self.version_cache_size:
+                self._versions.popitem(last=False)
+        return secret
+
+    def check_health(self) -> dict:
+        """Статус сервера и проверка токена; заодно открывает keep-alive соединение"""
+        health = self.client.sys.read_health_status(method="GET")
+        if not isinstance(health, dict) or health.get("sealed") or not health.get("initialized", True):
+            raise RuntimeError(f"OpenBao is not ready: {health}")
+        token = self.client.auth.token.lookup_self()["data"]
+        return {"version": health.get("version"), "token_ttl": token.get("ttl")}
+
+    async def warm_up(self) -> dict:
+        return await asyncio.to_thread(self.check_health)
+
+    def version_cache_stats(self) -> dict:
+        return {"size": len(self._versions), "max": self.version_cache_size, "hits": self.version_cache_hits}
+
     def write_secret(self, path: str, secret: dict):
         return self.client.secrets.kv.v2.create_or_update_secret(
             path=path,
@@ -30,3 +86,7 @@ class OpenBaoClient:
             mount_point=self.mount
         )
 
+    async def write_secret_async(self, path: str, secret: dict):
+        async with deadline.bounded():
+            return await asyncio.to_thread(self.write_secret, path, secret)
+
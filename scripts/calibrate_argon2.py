@@ -0,0 +1,63 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.append('/app')
+
+from core.config import ARGON2_MEMORY_COST, ARGON2_PARALLELISM, ARGON2_TIME_COST
+from core.security import build_argon2_hasher
+
+PASSWORD = "calibration-password-123"
+
+
+def measure_verify_ms(time_cost: int, memory_cost: int, parallelism: int, rounds: int) -> float:
+    """Медианное время verify (столько же, сколько hash) в миллисекундах"""
+    hasher = build_argon2_hasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+    hashed = hasher.hash(PASSWORD)
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        hasher.verify(PASSWORD, hashed)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def calibrate(target_ms: float, memory_cost: int, parallelism: int, rounds: int, max_time_cost: int):
+    """Минимальный time_cost, при котором verify занимает не меньше target_ms"""
+    elapsed = 0.0
+    for time_cost in range(1, max_time_cost + 1):
+        elapsed = measure_verify_ms(time_cost, memory_cost, parallelism, rounds)
+        print(f"time_cost={time_cost:<3} memory_cost={memory_cost} KiB parallelism={parallelism}: {elapsed:.1f} ms")
+        if elapsed >= target_ms:
+            return time_cost, elapsed
+    return max_time_cost, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Подбор параметров argon2id под целевое время проверки пароля")
+    parser.add_argument("--target-ms", type=float, default=250.0, help="целевое время verify, мс")
+    parser.add_argument("--memory-cost", type=int, default=ARGON2_MEMORY_COST, help="память, KiB")
+    parser.add_argument("--parallelism", type=int, default=min(ARGON2_PARALLELISM, os.cpu_count() or 1))
+    parser.add_argument("--rounds", type=int, default=5, help="замеров на каждый вариант")
+    parser.add_argument("--max-time-cost", type=int, default=20)
+    args = parser.parse_args()
+
+    current_ms = measure_verify_ms(ARGON2_TIME_COST, ARGON2_MEMORY_COST, ARGON2_PARALLELISM, args.rounds)
+    print(f"Current: time_cost={ARGON2_TIME_COST} memory_cost={ARGON2_MEMORY_COST} "
+          f"parallelism={ARGON2_PARALLELISM}: {current_ms:.1f} ms")
+
+    time_cost, elapsed = calibrate(args.target_ms, args.memory_cost, args.parallelism, args.rounds, args.max_time_cost)
+
+    print("=" * 50)
+    print(f"Verify takes {elapsed:.1f} ms (target {args.target_ms:.0f} ms). Put into .env:")
+    print(f"ARGON2_TIME_COST={time_cost}")
+    print(f"ARGON2_MEMORY_COST={args.memory_cost}")
+    print(f"ARGON2_PARALLELISM={args.parallelism}")
+    print("Existing hashes are rehashed with the new parameters on the next successful login.")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
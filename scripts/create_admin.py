@@ -1,4 +1,6 @@
 import asyncio
+import logging
+import os
 import sys
 
 sys.path.append('/app')
@@ -8,13 +10,11 @@ from database.models import Admin
 from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
 
-from pwdlib import PasswordHash
+from core.config import ADMIN_PASSWORD, ADMIN_USERNAME
+from core.log import setup_logging
+from core.security import get_password_hash
 
-password_hash = PasswordHash.recommended()
-
-
-def get_password_hash(password: str):
-    return password_hash.hash(password)
+logger = logging.getLogger("scripts.create_admin")
 
 
 async def wait_for_db():
@@ -24,14 +24,14 @@ async def wait_for_db():
         try:
             async with async_session_maker() as session:
                 await session.execute(select(1))
-                print("Database connection successful")
+                logger.info("Database connection successful")
                 return True
         except SQLAlchemyError:
             if i < max_retries - 1:
-                print(f"Waiting for database... ({i + 1}/{max_retries})")
+                logger.info("Waiting for database... (%d/%d)", i + 1, max_retries)
                 await asyncio.sleep(2)
             else:
-                print("Database connection failed")
+                logger.error("Database connection failed")
                 return False
 
 
@@ -39,8 +39,8 @@ async def create_admin():
     if not await wait_for_db():
         return
 
-    username = "admin"
-    password = "root"
+    username = ADMIN_USERNAME
+    password = ADMIN_PASSWORD
 
     try:
         async with async_session_maker() as session:
@@ -49,7 +49,7 @@ async def create_admin():
             existing_admin = result.scalar_one_or_none()
 
             if existing_admin:
-                print(f"Admin user '{username}' already exists")
+                logger.info("Admin user '%s' already exists", username)
                 return
 
             admin_user = Admin(
@@ -61,13 +61,15 @@ async def create_admin():
             await session.commit()
             await session.refresh(admin_user)
 
-            print("ADMIN USER CREATED SUCCESSFULLY")
-            print(f"Username: {username}")
-            print(f"Password: {password}")
+            # Пароль не попадает в логи; оператору он нужен только если задан по умолчанию
+            logger.info("Admin user created", extra={"username": username})
+            if "ADMIN_PASSWORD" not in os.environ:
+                print(f"Default admin password '{password}' is in use, change it (ADMIN_PASSWORD)", file=sys.stderr)
 
     except SQLAlchemyError as e:
-        print(f"Error creating admin user: {e}")
+        logger.error("Error creating admin user: %s", e)
 
 
 if __name__ == "__main__":
+    setup_logging()
     asyncio.run(create_admin())
\ No newline at end of file
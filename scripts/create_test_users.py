@@ -1,4 +1,5 @@
 import asyncio
+import logging
 import sys
 import os
 
@@ -9,13 +10,10 @@ from database.models import User
 from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
 
-from pwdlib import PasswordHash
+from core.log import setup_logging
+from core.security import get_password_hash
 
-password_hash = PasswordHash.recommended()
-
-
-def get_password_hash(password: str):
-    return password_hash.hash(password)
+logger = logging.getLogger("scripts.create_test_users")
 
 
 async def create_user_if_not_exists(user_data):
@@ -27,7 +25,7 @@ async def create_user_if_not_exists(user_data):
         existing_user = result.scalar_one_or_none()
 
         if existing_user:
-            print(f"User '{user_data['username']}' already exists")
+            logger.info("User '%s' already exists", user_data["username"])
             return False
 
         # Создаем пользователя
@@ -45,7 +43,7 @@ async def create_user_if_not_exists(user_data):
         await session.commit()
         await session.refresh(new_user)
 
-        print(f"User '{user_data['username']}' created successfully")
+        logger.info("User '%s' created successfully", user_data["username"])
         return True
 
 
@@ -76,15 +74,12 @@ async def create_test_users():
             created_count += 1
 
     if created_count > 0:
-        print("=" * 50)
-        print(f"SUCCESSFULLY CREATED {created_count} TEST USERS")
-        print("Available test users:")
-        for user in test_users:
-            print(f"   - Username: {user['username']}")
-            print(f"     Password: {user['password']}")
-        print("=" * 50)
+        logger.info(
+            "Created %d test users", created_count,
+            extra={"users": {user["username"]: user["password"] for user in test_users}}
+        )
     else:
-        print("ℹAll test users already exist")
+        logger.info("All test users already exist")
 
 
 async def main():
@@ -93,18 +88,19 @@ async def main():
         try:
             async with async_session_maker() as session:
                 await session.execute(select(1))
-                print("Database connection successful")
+                logger.info("Database connection successful")
                 break
         except SQLAlchemyError:
             if i < max_retries - 1:
-                print(f"Waiting for database... ({i + 1}/{max_retries})")
+                logger.info("Waiting for database... (%d/%d)", i + 1, max_retries)
                 await asyncio.sleep(2)
             else:
-                print("Database connection failed")
+                logger.error("Database connection failed")
                 return
 
     await create_test_users()
 
 
 if __name__ == "__main__":
+    setup_logging()
     asyncio.run(main())
\ No newline at end of file
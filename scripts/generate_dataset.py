@@ -0,0 +1,199 @@
+import argparse
+import asyncio
+import bisect
+import itertools
+import json
+import logging
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Tuple
+
+sys.path.append('/app')
+
+from core.log import setup_logging
+from core.security import get_password_hash
+from database.bulk import bulk_connection, copy_rows
+from database.models import AccessStatus
+
+logger = logging.getLogger("scripts.generate_dataset")
+
+USER_COLUMNS = ("username", "firstname", "lastname", "email", "position", "password_hash", "disabled")
+SECRET_COLUMNS = ("service_name", "keys")
+REQUEST_COLUMNS = (
+    "request_data", "access_period", "access_reason", "status", "response_message",
+    "secret_id", "user_id", "created_at", "update_at",
+)
+RECORD_COLUMNS = ("expiration_date", "user_id", "secret_id", "created_at", "update_at")
+
+POSITIONS = ("developer", "devops", "analyst", "qa", "manager")
+SECRET_KEYS = ("username", "password", "token", "api_key", "host", "port", "dsn", "certificate")
+ACCESS_PERIODS = (1, 7, 30, 90)
+
+
+class ZipfSampler:
+    """Выборка id с весом 1/rank^s; ранги перемешаны, чтобы горячие id не шли подряд"""
+
+    def __init__(self, ids: List[int], s: float, rng: random.Random):
+        self.ids = list(ids)
+        rng.shuffle(self.ids)
+        self.cum_weights = list(itertools.accumulate(1.0 / rank ** s for rank in range(1, len(self.ids) + 1)))
+        self.rng = rng
+
+    def sample(self, k: int) -> List[int]:
+        return self.rng.choices(self.ids, cum_weights=self.cum_weights, k=k)
+
+
+def chunked(rows: Iterator[tuple], size: int) -> Iterator[List[tuple]]:
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def user_rows(args, password_hash: str) -> Iterator[tuple]:
+    for i in range(args.users):
+        username = f"{args.prefix}-user-{i}"
+        yield (
+            username, f"First{i}", f"Last{i}", f"{username}@{args.prefix}.example",
+            POSITIONS[i % len(POSITIONS)], password_hash, False,
+        )
+
+
+def secret_rows(args, rng: random.Random) -> Iterator[tuple]:
+    for i in range(args.secrets):
+        keys = rng.sample(SECRET_KEYS, rng.randint(1, 4))
+        yield f"{args.prefix}-service-{i}", json.dumps(keys)
+
+
+def overlaps(intervals: List[Tuple[datetime, datetime]], start: datetime, end: datetime) -> bool:
+    index = bisect.bisect_left(intervals, (start,))
+    if index < len(intervals) and intervals[index][0] < end:
+        return True
+    return index > 0 and intervals[index - 1][1] > start
+
+
+def request_and_record_rows(args, user_sampler, secret_sampler, rng, chunk_size):
+    """Чанки (requests, records): одна выдача доступа на каждый approved запрос, пока не набрано --records.
+    Approved запрос, чей срок пересекся бы с уже выданным доступом той же пары, становится rejected"""
+    now = datetime.now(timezone.utc)
+    span = args.days * 86400
+    approved_share = args.approved_share
+    rejected_share = approved_share + args.rejected_share
+    pending_pairs = set()
+    # Интервалы выданных доступов по паре, отсортированы: доступы одной пары не пересекаются
+    granted: Dict[Tuple[int, int], List[Tuple[datetime, datetime]]] = {}
+    records_left = args.records
+
+    for offset in range(0, args.requests, chunk_size):
+        size = min(chunk_size, args.requests - offset)
+        requests, records = [], []
+        for user_id, secret_id in zip(user_sampler.sample(size), secret_sampler.sample(size)):
+            created_at = now - timedelta(seconds=rng.random() * span)
+            access_period = rng.choice(ACCESS_PERIODS)
+            roll = rng.random()
+            if roll >= rejected_share and (user_id, secret_id) not in pending_pairs:
+                # Частичный уникальный индекс: не больше одного pending на пару
+                pending_pairs.add((user_id, secret_id))
+                status, decided_at, message = AccessStatus.PENDING, created_at, None
+            else:
+                status = AccessStatus.APPROVED if roll < approved_share else AccessStatus.REJECTED
+                decided_at = created_at + timedelta(seconds=rng.expovariate(1 / args.decision_seconds))
+                message = "approved" if status == AccessStatus.APPROVED else "rejected"
+            grant = None
+            if status == AccessStatus.APPROVED and records_left > 0:
+                grant = (decided_at, decided_at + timedelta(days=access_period))
+                intervals = granted.setdefault((user_id, secret_id), [])
+                if overlaps(intervals, *grant):
+                    # Как ActiveAccessExists в приложении: пока доступ действует, второй не выдается
+                    status, message, grant = AccessStatus.REJECTED, "active access exists", None
+                else:
+                    bisect.insort(intervals, grant)
+            requests.append((
+                json.dumps({"source": args.prefix}), access_period,
+                "capacity test", status.value, message, secret_id, user_id,
+                created_at.replace(tzinfo=None), decided_at.replace(tzinfo=None),
+            ))
+            if grant is not None:
+                records_left -= 1
+                records.append((
+                    grant[1], user_id, secret_id,
+                    decided_at.replace(tzinfo=None), decided_at.replace(tzinfo=None),
+                ))
+        yield requests, records
+
+
+def rate(count: int, seconds: float) -> dict:
+    """Поля для extra=: строк, секунд и скорость"""
+    return {"rows": count, "seconds": round(seconds, 3), "rows_per_second": round(count / seconds) if seconds else 0}
+
+
+async def generate(args) -> None:
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    # Один хэш на всех: argon2 на 100k паролей занял бы больше, чем сама загрузка
+    password_hash = get_password_hash(args.password)
+
+    async with bulk_connection() as connection:
+        phase = time.perf_counter()
+        for chunk in chunked(user_rows(args, password_hash), args.chunk_size):
+            await copy_rows(connection, "users", USER_COLUMNS, chunk)
+        logger.info("Loaded users", extra=rate(args.users, time.perf_counter() - phase))
+
+        phase = time.perf_counter()
+        for chunk in chunked(secret_rows(args, rng), args.chunk_size):
+            await copy_rows(connection, "secrets", SECRET_COLUMNS, chunk)
+        logger.info("Loaded secrets", extra=rate(args.secrets, time.perf_counter() - phase))
+
+        user_ids = [row["id"] for row in await connection.fetch(
+            "SELECT id FROM users WHERE username LIKE $1", f"{args.prefix}-user-%")]
+        secret_ids = [row["id"] for row in await connection.fetch(
+            "SELECT id FROM secrets WHERE service_name LIKE $1", f"{args.prefix}-service-%")]
+        user_sampler = ZipfSampler(user_ids, args.user_skew, rng)
+        secret_sampler = ZipfSampler(secret_ids, args.secret_skew, rng)
+
+        phase = time.perf_counter()
+        request_count = record_count = 0
+        for requests, records in request_and_record_rows(args, user_sampler, secret_sampler, rng, args.chunk_size):
+            request_count += await copy_rows(connection, "accessrequests", REQUEST_COLUMNS, requests)
+            record_count += await copy_rows(connection, "accessrecords", RECORD_COLUMNS, records)
+        logger.info(
+            "Loaded access requests and %d access records", record_count,
+            extra=rate(request_count, time.perf_counter() - phase)
+        )
+
+        # Свежая статистика планировщика, иначе первые бенчмарки идут по планам для пустых таблиц
+        await connection.execute("ANALYZE users, secrets, accessrequests, accessrecords")
+
+    logger.info(
+        "Generated dataset in %.2fs (seed %d). Users log in with '%s-user-N' / '%s'. "
+        "Secrets exist only in the database, not in OpenBao.",
+        time.perf_counter() - started, args.seed, args.prefix, args.password
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Синтетический датасет для нагрузочного тестирования")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--secrets", type=int, default=50_000)
+    parser.add_argument("--requests", type=int, default=5_000_000)
+    parser.add_argument("--records", type=int, default=1_000_000, help="максимум выданных доступов")
+    parser.add_argument("--secret-skew", type=float, default=1.1, help="показатель Zipf для секретов (0 — равномерно)")
+    parser.add_argument("--user-skew", type=float, default=0.8, help="показатель Zipf для пользователей")
+    parser.add_argument("--approved-share", type=float, default=0.6)
+    parser.add_argument("--rejected-share", type=float, default=0.3, help="остальное — pending")
+    parser.add_argument("--decision-seconds", type=float, default=3600.0, help="среднее время до решения по запросу")
+    parser.add_argument("--days", type=int, default=365, help="глубина истории запросов")
+    parser.add_argument("--prefix", default="synth", help="префикс username/service_name")
+    parser.add_argument("--password", default="synthetic-password")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="строк на один COPY")
+    args = parser.parse_args()
+    setup_logging()
+    asyncio.run(generate(args))
+
+
+if __name__ == "__main__":
+    main()
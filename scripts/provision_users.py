@@ -0,0 +1,157 @@
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+sys.path.append('/app')
+
+from sqlalchemy import ARRAY, String, any_, bindparam, or_, select
+
+from core.log import setup_logging
+from core.security import get_password_hash
+from database.bulk import bulk_connection, copy_rows, insert_rows
+from database.database import async_session_maker
+from database.models import User
+
+logger = logging.getLogger("scripts.provision_users")
+
+REQUIRED_FIELDS = ("username", "firstname", "lastname", "password")
+USER_COLUMNS = ("username", "firstname", "lastname", "email", "position", "password_hash", "disabled")
+
+
+def load_users(path: str, file_format: str) -> List[dict]:
+    """Читает CSV (с заголовком) или JSON-массив объектов"""
+    with open(path, encoding="utf-8", newline="") as source:
+        if file_format == "json":
+            users = json.load(source)
+        else:
+            users = list(csv.DictReader(source))
+
+    valid, seen, seen_emails = [], set(), set()
+    for line, user in enumerate(users, start=1):
+        missing = [field for field in REQUIRED_FIELDS if not user.get(field)]
+        if missing:
+            logger.warning("Record %d: missing %s, skipped", line, ", ".join(missing))
+            continue
+        if user["username"] in seen:
+            logger.warning("Record %d: duplicate username '%s' in file, skipped", line, user["username"])
+            continue
+        # email тоже уникален в users: дубликат в файле уронил бы COPY посреди загрузки
+        if user.get("email") and user["email"] in seen_emails:
+            logger.warning("Record %d: duplicate email '%s' in file, skipped", line, user["email"])
+            continue
+        seen.add(user["username"])
+        if user.get("email"):
+            seen_emails.add(user["email"])
+        valid.append(user)
+    return valid
+
+
+async def find_existing(users: List[dict]) -> tuple:
+    """Один запрос на весь файл: username/email, которые уже есть в БД"""
+    usernames = [user["username"] for user in users]
+    emails = [user["email"] for user in users if user.get("email")]
+    query = select(User.username, User.email).where(or_(
+        User.username == any_(bindparam("usernames", usernames, type_=ARRAY(String))),
+        User.email == any_(bindparam("emails", emails, type_=ARRAY(String))),
+    ))
+    async with async_session_maker() as session:
+        result = await session.execute(query)
+        rows = result.all()
+    return {row.username for row in rows}, {row.email for row in rows if row.email}
+
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    return [get_password_hash(password) for password in passwords]
+
+
+async def hash_all(passwords: List[str], workers: int) -> List[str]:
+    """argon2 по пулу процессов, кусками, чтобы не гонять по одному паролю через IPC"""
+    loop = asyncio.get_running_loop()
+    chunk = max(1, len(passwords) // (workers * 4) or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = await asyncio.gather(*(
+            loop.run_in_executor(pool, hash_passwords, passwords[start:start + chunk])
+            for start in range(0, len(passwords), chunk)
+        ))
+    return [hashed for part in parts for hashed in part]
+
+
+async def insert_users(records: List[dict], method: str, chunk_size: int) -> None:
+    if method == "insert":
+        for start in range(0, len(records), chunk_size):
+            await insert_rows(User, records[start:start + chunk_size])
+        return
+    async with bulk_connection() as connection:
+        for start in range(0, len(records), chunk_size):
+            chunk = records[start:start + chunk_size]
+            await copy_rows(connection, User.__tablename__, USER_COLUMNS,
+                            [tuple(record[column] for column in USER_COLUMNS) for record in chunk])
+
+
+def rate(count: int, seconds: float) -> dict:
+    """Поля для extra=: строк, секунд и скорость"""
+    return {"rows": count, "seconds": round(seconds, 3), "rows_per_second": round(count / seconds) if seconds else 0}
+
+
+async def provision(args) -> None:
+    started = time.perf_counter()
+    users = load_users(args.file, args.format or os.path.splitext(args.file)[1].lstrip(".").lower())
+    logger.info("Loaded %d valid records from %s", len(users), args.file)
+
+    existing_usernames, existing_emails = await find_existing(users)
+    new_users = [
+        user for user in users
+        if user["username"] not in existing_usernames and user.get("email") not in existing_emails
+    ]
+    logger.info("Skipping %d users that already exist (username or email)", len(users) - len(new_users))
+    if not new_users:
+        return
+
+    hashing_started = time.perf_counter()
+    hashes = await hash_all([user["password"] for user in new_users], args.workers)
+    logger.info(
+        "Hashed passwords with %d workers", args.workers,
+        extra=rate(len(hashes), time.perf_counter() - hashing_started)
+    )
+
+    records = [
+        {
+            "username": user["username"],
+            "firstname": user["firstname"],
+            "lastname": user["lastname"],
+            "email": user.get("email") or None,
+            "position": user.get("position") or None,
+            "password_hash": password_hash,
+            "disabled": False,
+        }
+        for user, password_hash in zip(new_users, hashes)
+    ]
+
+    insert_started = time.perf_counter()
+    await insert_users(records, args.method, args.chunk_size)
+    logger.info("Inserted users via %s", args.method, extra=rate(len(records), time.perf_counter() - insert_started))
+    logger.info("Provisioned users", extra=rate(len(records), time.perf_counter() - started))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Массовое создание пользователей из CSV/JSON")
+    parser.add_argument("file", help="CSV с заголовком или JSON-массив: username, firstname, lastname, password, "
+                                     "email, position")
+    parser.add_argument("--format", choices=("csv", "json"), help="по умолчанию по расширению файла")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="процессов для хэширования")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="строк на одну вставку")
+    parser.add_argument("--method", choices=("copy", "insert"), default="copy")
+    args = parser.parse_args()
+    setup_logging()
+    asyncio.run(provision(args))
+
+
+if __name__ == "__main__":
+    main()